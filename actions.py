@@ -4,25 +4,40 @@ Cada acción está representada por una clase que hereda de la clase base Action
 """
 
 from __future__ import annotations  # Permite usar anotaciones de tipo en clases antes de su definición completa.
+from functools import lru_cache  # Memoriza resultados de funciones puras.
 from typing import Optional, Tuple, TYPE_CHECKING  # Importa herramientas para la comprobación de tipos y anotaciones.
 
 import color  # Módulo para manejar colores en los mensajes
 import exceptions  # Excepciones personalizadas para manejar errores en el juego
 import tile_types  # Tipos de tiles usados en el mapa del juego
+from pickle_state import restore_state  # Restaura el estado guardado (con o sin __slots__) al cargar una partida.
 
 # Este bloque solo importa las clases cuando se está realizando una comprobación de tipos, no se ejecuta en tiempo de ejecución.
 if TYPE_CHECKING:
     from engine import Engine  # La clase Engine, que maneja la lógica del juego
     from entity import Actor, Entity, Item  # Clases Actor, Entity y Item para las entidades del juego
 
+_SENTINEL = object()  # Marca un valor todavía no consultado (None es un resultado válido).
+
+
+@lru_cache(maxsize=64)
+def _capitalize(name: str) -> str:
+    """Devuelve el nombre con la primera letra en mayúscula, reutilizando la cadena para nombres repetidos."""
+    return name.capitalize()
 
 class Action:
     """Acción base que se realiza en el juego. Las acciones específicas como mover o atacar heredan de esta clase."""
 
+    __slots__ = ("entity",)  # Sin __dict__: instancias más ligeras y acceso a atributos más rápido.
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()  # Llama al constructor de la clase base
         self.entity = entity  # La entidad que realiza la acción (por ejemplo, el jugador o un enemigo)
 
+    def __setstate__(self, state) -> None:
+        """Restaura el estado al cargar una partida (las IA se guardan junto a su actor)."""
+        restore_state(self, state)
+
     @property # Define un método como una propiedad, permitiendo acceder a él como si fuera un atributo.
     def engine(self) -> Engine:
         """Devuelve el motor (Engine) al que pertenece esta acción."""
@@ -36,37 +51,38 @@ class Action:
 class PickupAction(Action):
     """Acción de recoger un objeto y añadirlo al inventario si hay espacio."""
 
+    __slots__ = ()
+
     def __init__(self, entity: Actor):
         super().__init__(entity)  # Llama al constructor de la clase base
 
     def perform(self) -> None:
-        actor_location_x = self.entity.x  # Obtiene la posición X del actor
-        actor_location_y = self.entity.y  # Obtiene la posición Y del actor
         inventory = self.entity.inventory  # Obtiene el inventario del actor
+        game_map = self.engine.game_map
 
-        # Itera sobre los objetos en el mapa buscando uno en la misma ubicación
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                # Si el inventario está lleno, lanza una excepción
-                if len(inventory.items) >= inventory.capacity:
-                    raise exceptions.Impossible("Tu inventario esta lleno.")
+        # Busca directamente en el índice de posiciones un objeto en la ubicación del actor
+        item = game_map.get_item_at_location(self.entity.x, self.entity.y)
+        if item is None:
+            # Si no hay objeto para recoger, lanza una excepción
+            raise exceptions.Impossible("No hay nada para recoger.")
 
-                # Elimina el objeto del mapa y lo agrega al inventario
-                self.engine.game_map.entities.remove(item)  # Elimina el objeto del mapa
-                item.parent = self.entity.inventory  # Asigna el inventario como padre del objeto
-                inventory.items.append(item)  # Añade el objeto al inventario
+        # Si el inventario está lleno, lanza una excepción
+        if len(inventory.items) >= inventory.capacity:
+            raise exceptions.Impossible("Tu inventario esta lleno.")
 
-                # Añade un mensaje en el registro de mensajes
-                self.engine.message_log.add_message(f"Has recogido {item.name}.")
-                return  # Termina la acción después de recoger el objeto
+        # Elimina el objeto del mapa y lo agrega al inventario
+        game_map.remove_entity(item)  # Elimina el objeto del mapa
+        inventory.add(item)  # Añade el objeto al inventario, que pasa a ser su padre
 
-        # Si no hay objeto para recoger, lanza una excepción
-        raise exceptions.Impossible("No hay nada para recoger.")
+        # Añade un mensaje en el registro de mensajes
+        self.engine.message_log.add_message(f"Has recogido {item.name}.")
 
 
 class ItemAction(Action):
     """Acción que involucra el uso de un objeto en el juego, como un consumible o un equipo."""
 
+    __slots__ = ("item", "target_xy")
+
     def __init__(
         self, entity: Actor, item: Item, target_xy: Optional[Tuple[int, int]] = None
     ):
@@ -94,6 +110,8 @@ class ItemAction(Action):
 class DropItem(ItemAction):
     """Acción de soltar un objeto del inventario."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         # Si el objeto está equipado, se des equipa primero
         if self.entity.equipment.item_is_equipped(self.item):
@@ -106,6 +124,8 @@ class DropItem(ItemAction):
 class EquipAction(Action):
     """Acción de equipar un objeto, como una armadura o arma."""
 
+    __slots__ = ("item",)
+
     def __init__(self, entity: Actor, item: Item):
         super().__init__(entity)  # Llama al constructor de la clase base
         self.item = item  # El objeto que se va a equipar
@@ -118,6 +138,8 @@ class EquipAction(Action):
 class WaitAction(Action):
     """Acción de esperar sin realizar ninguna acción."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         pass  # No hace nada, solo pasa
 
@@ -125,6 +147,8 @@ class WaitAction(Action):
 class TakeStairsAction(Action):
     """Acción de bajar por una escalera si está presente en la ubicación de la entidad."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         if (self.entity.x, self.entity.y) == self.engine.game_map.downstairs_location:
             # Si la ubicación de la entidad es la de la escalera, genera un nuevo piso
@@ -140,25 +164,39 @@ class TakeStairsAction(Action):
 class ActionWithDirection(Action):
     """Acción que tiene una dirección (movimiento o ataque)."""
 
+    __slots__ = ("dx", "dy", "dest_x", "dest_y", "dest_xy", "_blocking_entity", "_target_actor")
+
     def __init__(self, entity: Actor, dx: int, dy: int):
         super().__init__(entity)  # Llama al constructor de la clase base
         self.dx = dx  # Desplazamiento en X
         self.dy = dy  # Desplazamiento en Y
-
-    @property
-    def dest_xy(self) -> Tuple[int, int]:
-        """Devuelve la ubicación de destino de esta acción (desplazamiento calculado)."""
-        return self.entity.x + self.dx, self.entity.y + self.dy  # Calcula la ubicación de destino
+        self.dest_x = entity.x + dx  # Coordenada X de destino
+        self.dest_y = entity.y + dy  # Coordenada Y de destino
+        self.dest_xy: Tuple[int, int] = (self.dest_x, self.dest_y)  # Ubicación de destino de esta acción
+        self._blocking_entity = _SENTINEL  # Resultado memorizado de get_blocking_entity
+        self._target_actor = _SENTINEL  # Resultado memorizado de get_target_actor
+
+    def get_blocking_entity(self) -> Optional[Entity]:
+        """Devuelve la entidad que bloquea la ubicación de destino. Solo se consulta el mapa la primera vez."""
+        if self._blocking_entity is _SENTINEL:
+            self._blocking_entity = self.engine.game_map.get_blocking_entity_at_location(self.dest_x, self.dest_y)
+        return self._blocking_entity
+
+    def get_target_actor(self) -> Optional[Actor]:
+        """Devuelve el actor en la ubicación de destino. Solo se consulta el mapa la primera vez."""
+        if self._target_actor is _SENTINEL:
+            self._target_actor = self.engine.game_map.get_actor_at_location(self.dest_x, self.dest_y)
+        return self._target_actor
 
     @property
     def blocking_entity(self) -> Optional[Entity]:
         """Devuelve la entidad que bloquea la ubicación de destino."""
-        return self.engine.game_map.get_blocking_entity_at_location(*self.dest_xy)  # Obtiene la entidad bloqueante
+        return self.get_blocking_entity()  # Obtiene la entidad bloqueante
 
     @property
     def target_actor(self) -> Optional[Actor]:
         """Devuelve el actor en la ubicación de destino."""
-        return self.engine.game_map.get_actor_at_location(*self.dest_xy)  # Obtiene el actor en la ubicación de destino
+        return self.get_target_actor()  # Obtiene el actor en la ubicación de destino
 
     def perform(self) -> None:
         raise NotImplementedError()  # Lanza un error si no se implementa en una subclase
@@ -167,29 +205,32 @@ class ActionWithDirection(Action):
 class MeleeAction(ActionWithDirection):
     """Acción de ataque cuerpo a cuerpo."""
 
+    __slots__ = ()
+
+    def __init__(self, entity: Actor, dx: int, dy: int, target: Optional[Actor] = None):
+        super().__init__(entity, dx, dy)  # Llama al constructor de la clase base
+        if target is not None:
+            self._target_actor = target  # Objetivo ya conocido (por ejemplo, desde BumpAction)
+
     def perform(self) -> None:
-        target = self.target_actor  # Actor en la ubicación de destino
+        target = self.get_target_actor()  # Actor en la ubicación de destino
         if not target:
             raise exceptions.Impossible("Nada a lo que atacar.")  # Si no hay objetivo, lanza una excepción
 
         damage = self.entity.fighter.power - target.fighter.defense  # Calcula el daño
 
-        attack_desc = f"{self.entity.name.capitalize()} ataca a {target.name}."
-        # Define el color de la acción de ataque según si es el jugador o un enemigo
-        if self.entity is self.engine.player:
-            attack_color = color.player_atk
-        else:
-            attack_color = color.enemy_atk
+        attack_desc = f"{_capitalize(self.entity.name)} ataca a {target.name}."
+        attack_color = self.entity.attack_color  # Color del ataque según si es el jugador o un enemigo
 
         if damage > 0:
             # Si el daño es positivo, inflige el daño al objetivo
-            self.engine.message_log.add_message(
+            self.engine.message_log.add_message_deferred(
                 f"{attack_desc} Hace {damage} puntos de dano.", attack_color
             )
             target.fighter.hp -= damage
         else:
             # Si el daño es 0 o negativo, el ataque solo hace 1 de daño
-            self.engine.message_log.add_message(
+            self.engine.message_log.add_message_deferred(
                 f"{attack_desc} Hace 1 punto de dano.", attack_color
             )
             target.fighter.hp -= 1
@@ -198,17 +239,16 @@ class MeleeAction(ActionWithDirection):
 class MovementAction(ActionWithDirection):
     """Acción de movimiento (caminar o desplazarse)."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
-        dest_x, dest_y = self.dest_xy  # Obtiene la ubicación de destino
+        dest_x, dest_y = self.dest_x, self.dest_y  # Obtiene la ubicación de destino
 
-        # Comprueba si el destino está fuera de los límites del mapa
-        if not self.engine.game_map.in_bounds(dest_x, dest_y):
-            self.engine.message_log.add_message("Esto es una pared.", color.impossible)
-            return  # No hace nada si está fuera de los límites
-        if not self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
+        # Comprueba en una sola lectura si el destino está fuera de los límites o no es caminable
+        if not self.engine.game_map.get_walkable_padded()[dest_x + 1, dest_y + 1]:
             self.engine.message_log.add_message("Esto es una pared.", color.impossible)
-            return  # No hace nada si no es caminable
-        if self.engine.game_map.get_blocking_entity_at_location(dest_x, dest_y):
+            return  # No hace nada si está fuera de los límites o no es caminable
+        if self.get_blocking_entity():
             return  # No hace nada si hay una entidad bloqueando
 
         # Si no hay obstáculos, mueve la entidad
@@ -218,10 +258,13 @@ class MovementAction(ActionWithDirection):
 class BumpAction(ActionWithDirection):
     """Acción de colisión, decide si se ataca o se mueve."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
-        if self.target_actor:
+        target = self.get_target_actor()  # Consulta el mapa una sola vez
+        if target:
             # Si hay un actor en la ubicación de destino, se realiza un ataque cuerpo a cuerpo
-            return MeleeAction(self.entity, self.dx, self.dy).perform()
+            return MeleeAction(self.entity, self.dx, self.dy, target).perform()
         else:
             # Si no hay actor, se realiza un movimiento
             return MovementAction(self.entity, self.dx, self.dy).perform()
@@ -230,6 +273,8 @@ class BumpAction(ActionWithDirection):
 class RevealHiddenWallAction(Action):
     """Acción para revelar una pared falsa cuando el jugador interactúa con ella."""
 
+    __slots__ = ("target_x", "target_y")
+
     def __init__(self, entity: Actor, target_x: int, target_y: int):
         super().__init__(entity)  # Llama al constructor de la clase base
         self.target_x = target_x  # Coordenada X del objetivo
@@ -241,6 +286,7 @@ class RevealHiddenWallAction(Action):
         # Verifica si el tile es una pared falsa.
         if tile == tile_types.hidden_wall_tile:
             self.engine.game_map.tiles[self.target_x, self.target_y] = tile_types.floor  # Revela la pared.
+            self.engine.game_map.invalidate_tiles()  # Los costes de movimiento han cambiado.
             self.engine.message_log.add_message("Has descubierto una pared falsa.", color.player_atk)
         else:
             raise exceptions.Impossible("No hay nada que revelar aquí.")
\ No newline at end of file
@@ -3,6 +3,10 @@ Este módulo define una paleta de colores en formato RGB (Rojo, Verde, Azul) par
 Incluye colores básicos, colores relacionados con acciones, muertes, errores, texto, barras y menús.
 """
 
+from enum import IntEnum  # Importa IntEnum para indexar la tabla de colores por nombre.
+
+import numpy as np  # type: ignore
+
 # Colores básicos
 white = (0xFF, 0xFF, 0xFF)  # Blanco
 black = (0x0, 0x0, 0x0)     # Negro
@@ -33,7 +37,51 @@ health_recovered = (0x0, 0xFF, 0x0)  # Salud recuperada (verde brillante)
 bar_text = white  # Texto de la barra (blanco)
 bar_filled = (0x0, 0x60, 0x0)  # Barra llena (verde oscuro)
 bar_empty = (0x40, 0x10, 0x10)  # Barra vacía (rojo oscuro)
+xp_bar_filled = (0x0, 0x0, 0xC8)  # Barra de experiencia llena (azul)
 
 # Colores de menú
 menu_title = (255, 255, 63)  # Título del menú (amarillo claro)
-menu_text = white  # Texto del menú (blanco)
\ No newline at end of file
+menu_text = white  # Texto del menú (blanco)
+
+
+class ColorId(IntEnum):
+    """Índices de cada color dentro de la tabla `COLORS`."""
+    WHITE = 0
+    BLACK = 1
+    RED = 2
+    PLAYER_ATK = 3
+    ENEMY_ATK = 4
+    NEEDS_TARGET = 5
+    STATUS_EFFECT_APPLIED = 6
+    DESCEND = 7
+    INVISIBILITY_APPLIED = 8
+    PLAYER_DIE = 9
+    ENEMY_DIE = 10
+    INVALID = 11
+    IMPOSSIBLE = 12
+    ERROR = 13
+    WELCOME_TEXT = 14
+    HEALTH_RECOVERED = 15
+    BAR_FILLED = 16
+    BAR_EMPTY = 17
+    MENU_TITLE = 18
+    XP_BAR_FILLED = 19
+
+
+# Tabla contigua de colores (N, 3) en uint8, indexada por ColorId.
+# Se usa al escribir colores directamente en `console.rgb` (barras, cursor), donde cada fila se copia tal cual sin
+# convertir una tupla en cada asignación; las tuplas de arriba se mantienen para los mensajes y las llamadas de tcod.
+COLORS = np.array(
+    [
+        white, black, red,
+        player_atk, enemy_atk, needs_target, status_effect_applied, descend, invisibility_applied,
+        player_die, enemy_die,
+        invalid, impossible, error,
+        welcome_text, health_recovered,
+        bar_filled, bar_empty,
+        menu_title,
+        xp_bar_filled,
+    ],
+    dtype=np.uint8,
+)
+COLORS.flags.writeable = False  # La paleta es de solo lectura.
@@ -0,0 +1,36 @@
+"""
+Propósito del código:
+Funciones numéricas que usa la IA de los enemigos para calcular caminos. Trabajan solo con arrays de numpy
+(matriz de costes y mapa de distancias), sin tocar entidades ni el motor, para que todo el trabajo pesado
+se haga dentro de numpy y tcod en lugar de en bucles de Python.
+"""
+
+from __future__ import annotations  # Permite usar anotaciones de tipo antes de su definición completa.
+from typing import Optional  # Importa tipos para la anotación de tipos.
+
+import numpy as np  # Importa numpy para trabajar con las matrices de costes y distancias.
+import tcod  # Importa tcod para descender por los mapas de distancias.
+import tcod.los  # Importa las líneas de Bresenham para los caminos en línea recta.
+from game_map import UNREACHABLE  # Valor de las casillas inalcanzables en los mapas de distancias.
+
+
+def straight_path(cost: np.ndarray, x: int, y: int, dest_x: int, dest_y: int) -> Optional[np.ndarray]:
+    """
+    Devuelve la línea recta de Bresenham hasta el destino si está libre, o None si no se puede usar.
+
+    El destino solo tiene que ser caminable (puede estar ocupado, p. ej. por el jugador); las casillas
+    intermedias deben ser caminables y no tener ninguna entidad que bloquee.
+    """
+    line = tcod.los.bresenham((x, y), (dest_x, dest_y))[1:]  # Sin incluir la posición actual.
+    if not len(line) or not cost[dest_x, dest_y]:
+        return None
+    if not (cost[line[:-1, 0], line[:-1, 1]] == 1).all():
+        return None
+    return line
+
+
+def descend_path(distance: np.ndarray, x: int, y: int) -> Optional[np.ndarray]:
+    """Desciende por el mapa de distancias desde (x, y) hasta el destino, o devuelve None si es inalcanzable."""
+    if distance[x, y] == UNREACHABLE:
+        return None
+    return tcod.path.hillclimb2d(distance, (x, y), True, True)[1:]  # Sin incluir la posición actual.
@@ -9,21 +9,42 @@ from __future__ import annotations  # Permite usar anotaciones de tipo en clases
 from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction  # Importa diferentes acciones para el juego.
 from typing import List, Optional, Tuple, TYPE_CHECKING  # Importa tipos para la anotación de tipos, útil para control de tipos en las funciones.
 
-import numpy as np  # Importa numpy para manipular matrices y realizar cálculos numéricos (como los mapas de caminos).
-import tcod  # Importa tcod, la librería usada para gráficos en juegos roguelike y mapas de caminos.
 import random  # Importa el módulo random para generar números aleatorios, utilizado para movimientos aleatorios.
 import color  # Importa un módulo que contiene colores predefinidos para mensajes en el juego.
+from components._ai_kernels import descend_path, straight_path  # Cálculos de caminos sobre arrays de numpy.
+from game_map import FLOW_DIRECTIONS, FLOW_NONE  # Direcciones de los mapas de flujo hacia el jugador.
 
 # Este bloque solo importa las clases cuando se está realizando una comprobación de tipos, no se ejecuta en tiempo de ejecución.
 if TYPE_CHECKING:
+    from engine import Engine  # Solo importa la clase `Engine` durante la comprobación de tipos.
     from entity import Actor  # Solo importa la clase `Actor` durante la comprobación de tipos.
 
+# Direcciones posibles de un movimiento aleatorio, creadas una sola vez.
+_CONFUSED_DIRS: Tuple[Tuple[int, int], ...] = (
+    (-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1),
+)
+_rand_int = random.randrange  # Referencia directa para evitar la búsqueda del atributo en cada turno.
+
+RETARGET_DISTANCE = 2  # Casillas que puede moverse el jugador antes de que un camino guardado se recalcule.
+
+
 class BaseAI(Action):
     """
     Clase base para la inteligencia artificial (IA) de los enemigos.
     Define los métodos generales que las subclases de enemigos usarán, como calcular caminos hacia el jugador.
     """
-    
+
+    __slots__ = ("_engine",)  # Las IA viven toda la partida: sin __dict__ ocupan menos memoria.
+
+    @property
+    def engine(self) -> Engine:
+        """Devuelve el motor del juego, que se obtiene a través del mapa de la entidad solo la primera vez."""
+        try:
+            return self._engine
+        except AttributeError:
+            engine = self._engine = self.entity.gamemap.engine  # El motor no cambia durante la partida.
+            return engine
+
     def perform(self) -> None:
         """
         Método abstracto que debe ser implementado por las subclases.
@@ -31,65 +52,117 @@ class BaseAI(Action):
         """
         raise NotImplementedError()
 
+    def is_idle(self) -> bool:
+        """
+        Devuelve True si la IA no haría nada en este turno (por ejemplo, un enemigo fuera de la vista sin camino que seguir).
+        El motor usa este método para omitir su turno sin crear acciones.
+        """
+        return False
+
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         """Calcula un camino desde la posición del enemigo hasta las coordenadas de destino."""
-        cost = np.array(self.engine.game_map.tiles["walkable"], dtype=np.int8)  # Crea una matriz de costos (el esfuerzo necesario para moverse) para el mapa.
-
-        # Modifica los costos de las casillas bloqueadas para hacerlas más costosas de atravesar.
-        for entity in self.engine.game_map.entities:
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                cost[entity.x, entity.y] += 10
-
-        # Crea un gráfico con los costos y utiliza el algoritmo Pathfinder de tcod para calcular el camino.
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
-        pathfinder.add_root((self.entity.x, self.entity.y))
+        game_map = self.engine.game_map
+        x, y = self.entity.x, self.entity.y
+        key = (x, y, dest_x, dest_y)
+        cached = game_map.get_cached_path(key)
+        if cached is not None:
+            return list(cached)  # Mismo origen, destino y bloqueos: el camino no ha cambiado.
 
-        # Calcula el camino hacia el destino.
-        path: List[Tuple[int, int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
+        # Atajo: si la línea recta hasta el destino está libre, no hace falta buscar un camino.
+        path = straight_path(game_map.get_path_cost(), x, y, dest_x, dest_y)
+        if path is None:
+            # Mapa de distancias hacia el destino, compartido por todos los enemigos que lo persiguen.
+            path = descend_path(game_map.get_distance_field(dest_x, dest_y), x, y)
+            if path is None:
+                return []  # No hay forma de llegar al destino.
 
-        # Filtra el camino para asegurarse de que todas las posiciones son válidas.
-        valid_path = [
-            (x, y) for x, y in path if self.engine.game_map.in_bounds(x, y) and self.engine.game_map.tiles["walkable"][x, y]
-        ]
+        # Ambos caminos solo pasan por casillas dentro del mapa y caminables.
+        assert game_map.get_walkable_padded()[path[:, 0] + 1, path[:, 1] + 1].all(), "Camino con pasos no válidos"
+        valid_path = list(map(tuple, path.tolist()))
+        game_map.cache_path(key, tuple(valid_path))
         return valid_path
 
+
 class HostileEnemy(BaseAI):
     """IA para enemigos hostiles que siguen al jugador y lo atacan cuando se acercan."""
 
+    __slots__ = ("path", "_path_idx", "_path_player_pos")
+
     def __init__(self, entity: Actor):
         super().__init__(entity)  # Inicializa la clase base con la entidad.
-        self.path: List[Tuple[int, int]] = []  # Inicializa el atributo path (camino) como una lista vacía.
+        self.path: List[Tuple[int, int]] = []  # Camino hacia la última posición en la que se vio al jugador.
+        self._path_idx = 0  # Índice del siguiente paso del camino.
+        self._path_player_pos: Optional[Tuple[int, int]] = None  # Última posición vista del jugador sin camino aún.
 
-    def perform(self) -> None:
+    def __setstate__(self, state) -> None:
+        """Valores por defecto para los atributos que no existían en partidas antiguas."""
+        self.path = []
+        self._path_idx = 0
+        self._path_player_pos = None
+        super().__setstate__(state)
+
+    def is_idle(self) -> bool:
+        """
+        El enemigo no actúa si el jugador es invisible, o si está fuera de la vista sin camino pendiente
+        ni una última posición del jugador a la que dirigirse.
+        """
         if self.engine.player.invisible:
+            return True
+        return (
+            not self.engine.game_map.visible[self.entity.x, self.entity.y]
+            and self._path_idx >= len(self.path)
+            and self._path_player_pos is None
+        )
+
+    def perform(self) -> None:
+        engine = self.engine  # Evita recorrer entity.gamemap.engine en cada acceso.
+        target = engine.player  # El objetivo del enemigo es el jugador.
+        if target.invisible:
             return  # Si el jugador es invisible, el enemigo no hace nada.
 
-        target = self.engine.player  # El objetivo del enemigo es el jugador.
-        dx = target.x - self.entity.x  # Calcula la diferencia en las coordenadas x.
-        dy = target.y - self.entity.y  # Calcula la diferencia en las coordenadas y.
-        distance = max(abs(dx), abs(dy))  # Calcula la distancia de Chebyshev (máxima diferencia entre las coordenadas).
+        entity = self.entity
+        game_map = engine.game_map
+        x, y = entity.x, entity.y
+        dx = target.x - x  # Calcula la diferencia en las coordenadas x.
+        dy = target.y - y  # Calcula la diferencia en las coordenadas y.
+
+        if game_map.visible[x, y]:
+            if -1 <= dx <= 1 and -1 <= dy <= 1:  # Si el enemigo está junto al jugador (distancia de Chebyshev 1).
+                return MeleeAction(entity, dx, dy).perform()  # Realiza un ataque cuerpo a cuerpo.
 
-        if self.engine.game_map.visible[self.entity.x, self.entity.y]:
-            if distance <= 1:  # Si el enemigo está cerca del jugador (distancia 1).
-                return MeleeAction(self.entity, dx, dy).perform()  # Realiza un ataque cuerpo a cuerpo.
+            # A la vista del jugador, el siguiente paso se lee del mapa de flujo compartido por todos los enemigos.
+            self._path_player_pos = (target.x, target.y)  # Recuerda dónde lo vio por última vez.
+            self._path_idx = len(self.path)  # Cualquier camino anterior queda obsoleto.
+            direction = game_map.get_flow_field(target.x, target.y)[x, y]
+            if direction == FLOW_NONE:
+                return WaitAction(entity).perform()  # No hay forma de acercarse al jugador.
+            step_x, step_y = FLOW_DIRECTIONS[direction]
+            return MovementAction(entity, step_x, step_y).perform()
 
-            # Si no hay un camino, calcula uno nuevo hacia el jugador.
-            if not self.path:
-                self.path = self.get_path_to(target.x, target.y)
+        # Fuera de la vista, se dirige a la última posición en la que vio al jugador.
+        path = self.path
+        path_idx = self._path_idx
+        if path_idx >= len(path) and self._path_player_pos is not None:
+            path = self.path = self.get_path_to(*self._path_player_pos)
+            path_idx = 0
+            self._path_player_pos = None
 
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)  # Obtiene el siguiente destino en el camino.
+        if path_idx < len(path):
+            dest_x, dest_y = path[path_idx]  # Obtiene el siguiente destino en el camino.
+            self._path_idx = path_idx + 1
 
-            # Verifica que el destino sea válido y caminable.
-            if self.engine.game_map.in_bounds(dest_x, dest_y) and self.engine.game_map.tiles["walkable"][dest_x, dest_y]:
-                return MovementAction(self.entity, dest_x - self.entity.x, dest_y - self.entity.y).perform()  # Mueve al enemigo.
+            # Comprueba que el siguiente paso siga siendo adyacente (un movimiento bloqueado lo desplaza).
+            if -1 <= dest_x - x <= 1 and -1 <= dest_y - y <= 1:
+                return MovementAction(entity, dest_x - x, dest_y - y).perform()  # Mueve al enemigo.
+            self._path_player_pos = path[-1]  # Recalcula el camino el próximo turno.
 
-        return WaitAction(self.entity).perform()  # Si no puede moverse, espera.
+        return WaitAction(entity).perform()  # Si no puede moverse, espera.
 
 class ConfusedEnemy(BaseAI):
     """IA para enemigos confundidos que se mueven aleatoriamente durante varios turnos."""
 
+    __slots__ = ("previous_ai", "turns_remaining")
+
     def __init__(self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: int):
         """Inicializa la IA para un enemigo confundido."""
         super().__init__(entity)  # Llama al constructor de la clase base.
@@ -104,9 +177,7 @@ class ConfusedEnemy(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # Si aún queda confusión, el enemigo se mueve aleatoriamente.
-            direction_x, direction_y = random.choice(
-                [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
-            )
+            direction_x, direction_y = _CONFUSED_DIRS[_rand_int(8)]
 
             self.turns_remaining -= 1  # Decrementa los turnos de confusión.
 
@@ -116,29 +187,48 @@ class ConfusedEnemy(BaseAI):
 class RangedEnemy(BaseAI):
     """IA para enemigos que atacan a distancia, como un goblin."""
 
+    __slots__ = ("turns_to_attack", "path", "_path_idx", "_path_target")
+
     def __init__(self, entity: Actor):
         super().__init__(entity)  # Inicializa la clase base.
         self.turns_to_attack = 3  # El goblin ataca cada 3 turnos.
+        self.path: List[Tuple[int, int]] = []  # Camino guardado hacia el jugador.
+        self._path_idx = 0  # Índice del siguiente paso del camino.
+        self._path_target: Optional[Tuple[int, int]] = None  # Posición del jugador cuando se calculó el camino.
+
+    def __setstate__(self, state) -> None:
+        """Valores por defecto para los atributos que no existían en partidas antiguas."""
+        self.path = []
+        self._path_idx = 0
+        self._path_target = None
+        super().__setstate__(state)
+
+    def is_idle(self) -> bool:
+        """El goblin solo espera si el jugador es invisible o si está fuera de la vista."""
+        return self.engine.player.invisible or not self.engine.game_map.visible[self.entity.x, self.entity.y]
 
     def perform(self) -> None:
         """Realiza la acción del goblin en su turno."""
-        target = self.engine.player  # El objetivo es el jugador.
+        engine = self.engine  # Evita recorrer entity.gamemap.engine en cada acceso.
+        entity = self.entity
+        target = engine.player  # El objetivo es el jugador.
         # Si el jugador es invisible, el goblin no hace nada.
         if target.invisible:
-            return WaitAction(self.entity).perform()
-        dx = target.x - self.entity.x  # Calcula la diferencia en las coordenadas x.
-        dy = target.y - self.entity.y  # Calcula la diferencia en las coordenadas y.
-        distance = max(abs(dx), abs(dy))  # Calcula la distancia de Chebyshev.
+            return WaitAction(entity).perform()
+        x, y = entity.x, entity.y
+        target_x, target_y = target.x, target.y
+        dx = target_x - x  # Calcula la diferencia en las coordenadas x.
+        dy = target_y - y  # Calcula la diferencia en las coordenadas y.
 
-        if not self.engine.game_map.visible[self.entity.x, self.entity.y]:
-            return WaitAction(self.entity).perform()  # Espera si el goblin no está en la vista del jugador.
+        if not engine.game_map.visible[x, y]:
+            return WaitAction(entity).perform()  # Espera si el goblin no está en la vista del jugador.
 
-        if distance <= 5:  # Si el jugador está dentro del rango de ataque a distancia.
+        if -5 <= dx <= 5 and -5 <= dy <= 5:  # Si el jugador está dentro del rango de ataque a distancia (Chebyshev 5).
             if self.turns_to_attack <= 0:
                 # Ataca al jugador si es el turno de atacar.
                 damage = 4  # Define el daño que inflige el ataque a distancia.
-                self.engine.message_log.add_message(
-                    f"{self.entity.name} dispara una flecha a {target.name}. Hace {damage} puntos de dano.", color.enemy_atk
+                engine.message_log.add_message_deferred(
+                    f"{entity.name} dispara una flecha a {target.name}. Hace {damage} puntos de dano.", color.enemy_atk
                 )
                 target.fighter.take_damage(4)  # El goblin hace 4 puntos de daño al jugador.
                 self.turns_to_attack = 3  # Reinicia el contador de turnos de ataque.
@@ -146,10 +236,30 @@ class RangedEnemy(BaseAI):
                 self.turns_to_attack -= 1  # Reduce el contador de turnos de ataque.
             return  # No se mueve si está dentro del rango de ataque.
 
-        # Si el jugador está fuera del rango, se mueve hacia él.
-        self.path = self.get_path_to(target.x, target.y)
-        if self.path:
-            dest_x, dest_y = self.path.pop(0)  # Obtiene el siguiente destino en el camino.
-            return MovementAction(self.entity, dest_x - self.entity.x, dest_y - self.entity.y).perform()  # Mueve al goblin.
+        path = self.path
+        path_idx = self._path_idx
+
+        # Descarta el camino guardado si el jugador se ha alejado demasiado de su destino
+        # o si el siguiente paso ya no es adyacente (por ejemplo, porque un movimiento fue bloqueado).
+        if path_idx < len(path):
+            path_target_x, path_target_y = self._path_target
+            next_x, next_y = path[path_idx]
+            if (
+                not -RETARGET_DISTANCE <= target_x - path_target_x <= RETARGET_DISTANCE
+                or not -RETARGET_DISTANCE <= target_y - path_target_y <= RETARGET_DISTANCE
+                or not (-1 <= next_x - x <= 1 and -1 <= next_y - y <= 1)
+            ):
+                path_idx = len(path)  # Marca el camino como agotado.
+
+        # Si el jugador está fuera del rango y no hay camino, calcula uno nuevo hacia él.
+        if path_idx >= len(path):
+            path = self.path = self.get_path_to(target_x, target_y)
+            path_idx = 0
+            self._path_target = (target_x, target_y)
+        if path_idx < len(path):
+            dest_x, dest_y = path[path_idx]  # Obtiene el siguiente destino en el camino.
+            self._path_idx = path_idx + 1
+            return MovementAction(entity, dest_x - x, dest_y - y).perform()  # Mueve al goblin.
 
-        return WaitAction(self.entity).perform()  # Si no puede moverse, espera.
\ No newline at end of file
+        self._path_idx = path_idx
+        return WaitAction(entity).perform()  # Si no puede moverse, espera.
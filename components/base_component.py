@@ -13,10 +13,12 @@ La clase `BaseComponent` proporciona dos funcionalidades principales:
 
 from __future__ import annotations  # Importación de la futura compatibilidad con anotaciones de tipo en clases y métodos.
 from typing import TYPE_CHECKING  # Importa TYPE_CHECKING, utilizado para importar clases solo cuando se realiza la comprobación de tipos estáticos.
+from pickle_state import restore_state  # Restaura el estado guardado (con o sin __slots__) al cargar una partida.
 
 # Este bloque solo importa las clases cuando se está realizando una comprobación de tipos, no se ejecuta en tiempo de ejecución.
 if TYPE_CHECKING:
     from engine import Engine  # La clase Engine se importa solo para la comprobación de tipos.
+    from message_log import MessageLog  # La clase MessageLog se importa solo para la comprobación de tipos.
     from entity import Entity  # La clase Entity se importa solo para la comprobación de tipos.
     from game_map import GameMap  # La clase GameMap se importa solo para la comprobación de tipos.
 
@@ -30,8 +32,16 @@ class BaseComponent:
     la entidad que posee el componente (padre) y funcionalidades comunes como obtener el mapa de juego y el motor.
     """
     
+    # 'parent' almacena la referencia a la entidad que posee este componente; '_engine' y '_log' guardan el motor
+    # y su registro de mensajes tras el primer acceso.
+    __slots__ = ("parent", "_engine", "_log")  # Sin __dict__ en los componentes que también declaran __slots__.
+
     parent: Entity  # Atributo que almacena la referencia a la entidad que posee este componente. 'parent' es un objeto de la clase `Entity`.
 
+    def __setstate__(self, state) -> None:
+        """Restaura el estado al cargar una partida."""
+        restore_state(self, state)
+
     @property
     def gamemap(self) -> GameMap:
         """
@@ -48,6 +58,23 @@ class BaseComponent:
         Devuelve el motor de juego asociado al mapa de juego.
         
         El motor de juego es el sistema central que gestiona la lógica de juego, las actualizaciones y otros procesos
-        importantes. Este método accede al motor de juego a través del mapa de juego y lo proporciona como una propiedad.
+        importantes. El motor es el mismo durante toda la partida (aunque cambie el mapa), así que se obtiene una vez
+        a través del mapa de la entidad y se guarda para los siguientes accesos.
+        """
+        try:
+            return self._engine
+        except AttributeError:
+            engine = self._engine = self.gamemap.engine  # Recorre parent.gamemap.engine solo la primera vez.
+            return engine
+
+    @property
+    def message_log(self) -> MessageLog:
+        """
+        Devuelve el registro de mensajes del motor. Como el motor, no cambia durante la partida, así que se guarda
+        en el primer acceso y los mensajes siguientes no recorren parent.gamemap.engine.message_log.
         """
-        return self.gamemap.engine  # Retorna el motor de juego asociado al mapa de juego de la entidad.
\ No newline at end of file
+        try:
+            return self._log
+        except AttributeError:
+            log = self._log = self.engine.message_log
+            return log
@@ -7,16 +7,15 @@ cuando se activa, gestionando la interacción entre los actores, el consumo del
 """
 
 from __future__ import annotations  # Permite la anotación de tipos para clases que se definen después en el código.
-from typing import Optional, TYPE_CHECKING, Callable  # Importa herramientas para el manejo de tipos en el código.
+from functools import partial  # Crea los callbacks de selección de objetivo sin closures.
+from typing import Optional, Tuple, TYPE_CHECKING  # Importa herramientas para el manejo de tipos en el código.
 from components.base_component import BaseComponent  # Importa la clase base para los componentes de los ítems.
 from exceptions import Impossible  # Importa la excepción personalizada "Impossible".
-from entity import Actor  # Importa la clase Actor, que representa a los personajes en el juego.
+import numpy as np  # Importa numpy para elegir el objetivo del rayo de forma vectorizada.
 
 import actions  # Importa las acciones que los actores pueden realizar.
 import color  # Importa los colores utilizados en la interfaz gráfica o mensajes.
-import components.ai  # Importa componentes relacionados con la inteligencia artificial de los actores.
-import components.inventory  # Importa componentes relacionados con el inventario de los actores.
-import exceptions  # Importa las excepciones personalizadas.
+from components.ai import ConfusedEnemy  # IA que se asigna a los enemigos confundidos.
 
 from input_handlers import (  # Importa los manejadores de entrada de acciones y ataques.
     ActionOrHandler,  # Importa el manejador que puede ser una acción o un controlador de entrada.
@@ -31,12 +30,18 @@ if TYPE_CHECKING:
 class Consumable(BaseComponent):
     """Clase base para los ítems consumibles, como pociones o hechizos."""
 
+    __slots__ = ()
+
     parent: Item  # El ítem al que pertenece este componente.
 
     def get_action(self, consumer: Actor) -> Optional[ActionOrHandler]:
         """Devuelve la acción que este ítem puede realizar cuando se usa."""
         return actions.ItemAction(consumer, self.parent)
 
+    def make_target_action(self, consumer: Actor, target_xy: Tuple[int, int]) -> actions.ItemAction:
+        """Crea la acción de usar este ítem sobre la casilla elegida. Se usa como callback de los manejadores de objetivo."""
+        return actions.ItemAction(consumer, self.parent, target_xy)
+
     def activate(self, action: actions.ItemAction) -> None:
         """Método abstracto que debe ser implementado por cada consumible para definir qué hace al activarse."""
         raise NotImplementedError()
@@ -44,13 +49,15 @@ class Consumable(BaseComponent):
     def consume(self) -> None:
         """Elimina el item consumido de su inventario."""
         entity = self.parent
-        inventory = entity.parent
-        if isinstance(inventory, components.inventory.Inventory):
-            inventory.items.remove(entity)  # Elimina el ítem del inventario
+        remove = getattr(entity.parent, "remove", None)  # Solo los inventarios tienen `remove`.
+        if remove is not None:
+            remove(entity)  # Elimina el ítem del inventario
 
 class ConfusionConsumable(Consumable):
     """Consumible que confunde a un enemigo durante un número de turnos."""
 
+    __slots__ = ("number_of_turns",)
+
     def __init__(self, number_of_turns: int):
         """Inicializa el consumible con el número de turnos de confusión."""
         self.number_of_turns = number_of_turns
@@ -62,7 +69,7 @@ class ConfusionConsumable(Consumable):
         )
         return SingleRangedAttackHandler(
             self.engine,
-            callback=lambda xy: actions.ItemAction(consumer, self.parent, xy),  # Acción que se realiza al elegir un objetivo.
+            callback=partial(self.make_target_action, consumer),  # Acción que se realiza al elegir un objetivo.
         )
 
     def activate(self, action: actions.ItemAction) -> None:
@@ -70,9 +77,6 @@ class ConfusionConsumable(Consumable):
         consumer = action.entity  # Actor que usa el consumible.
         target = action.target_actor  # Actor objetivo de la confusión.
 
-        # Verifica que el objetivo esté en el rango visible.
-        if not self.engine.game_map.visible[action.target_xy]:
-            raise Impossible("No puedes disparar a un lugar que no puedes ver.")
         if not target:
             raise Impossible("Debes seleccionar a un enemigo como objetivo.")
         if target is consumer:
@@ -83,7 +87,7 @@ class ConfusionConsumable(Consumable):
             f"Los ojos de {target.name} parecen distraidos, como empieza a dar tumbos.",
             color.status_effect_applied,
         )
-        target.ai = components.ai.ConfusedEnemy(
+        target.ai = ConfusedEnemy(
             entity=target, previous_ai=target.ai, turns_remaining=self.number_of_turns,
         )
         self.consume()  # Consume el ítem después de activarse.
@@ -91,6 +95,8 @@ class ConfusionConsumable(Consumable):
 class FireballDamageConsumable(Consumable):
     """Consumible que lanza una bola de fuego causando daño en un área."""
 
+    __slots__ = ("damage", "radius")
+
     def __init__(self, damage: int, radius: int):
         """Inicializa el consumible con el daño y el radio de efecto."""
         self.damage = damage
@@ -104,35 +110,33 @@ class FireballDamageConsumable(Consumable):
         return AreaRangedAttackHandler(
             self.engine,
             radius=self.radius,  # Radio de la explosión.
-            callback=lambda xy: actions.ItemAction(consumer, self.parent, xy),
+            callback=partial(self.make_target_action, consumer),
         )
 
     def activate(self, action: actions.ItemAction) -> None:
         """Activa el consumible y lanza una bola de fuego en el área seleccionada."""
         target_xy = action.target_xy
+        engine = self.engine  # Se resuelve una sola vez fuera del bucle.
+        game_map = engine.game_map
 
-        # Verifica que el lugar objetivo esté visible.
-        if not self.engine.game_map.visible[target_xy]:
-            raise Impossible("No puedes disparar a un lugar que no puedes ver.")
-
-        targets_hit = False  # Bandera que indica si se ha golpeado al menos a un objetivo.
-
-        # Recorre todos los actores en el mapa y aplica el daño a los que estén dentro del radio.
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"{actor.name} se ve envuelto en una gran explosion, recibe {self.damage} de dano."
-                )
-                actor.fighter.take_damage(self.damage)  # Aplica el daño al actor.
-                targets_hit = True
-
-        if not targets_hit:
+        # Reúne primero a los alcanzados: el daño puede matar actores y cambiar los índices del mapa.
+        hit_actors = game_map.actors_in_radius(*target_xy, self.radius)
+        if not hit_actors:
             raise Impossible("No hay objetivos en el radio.")
+
+        # Aplica el daño a los actores alcanzados. Los mensajes se formatean al volcarse en el registro.
+        add_message = engine.message_log.add_message_lazy
+        damage = self.damage
+        for actor in hit_actors:
+            add_message("%s se ve envuelto en una gran explosion, recibe %d de dano.", actor.name, damage)
+            actor.fighter.take_damage(damage)  # Aplica el daño al actor.
         self.consume()  # Consume el ítem después de activarse.
 
 class HealingConsumable(Consumable):
     """Consumible que recupera una cantidad de salud al consumidor."""
 
+    __slots__ = ("amount",)
+
     def __init__(self, amount: int):
         """Inicializa el consumible con la cantidad de salud que recupera."""
         self.amount = amount
@@ -142,7 +146,7 @@ class HealingConsumable(Consumable):
         consumer = action.entity
 
         if consumer.fighter.hp == consumer.fighter.max_hp:
-            raise exceptions.Impossible("Tienes la vida al maximo.")
+            raise Impossible("Tienes la vida al maximo.")
 
         amount_recovered = consumer.fighter.heal(self.amount)
 
@@ -160,6 +164,8 @@ class HealingConsumable(Consumable):
 class LightningDamageConsumable(Consumable):
     """Consumible que lanza un rayo causando daño al enemigo más cercano."""
 
+    __slots__ = ("damage", "maximum_range")
+
     def __init__(self, damage: int, maximum_range: int):
         """Inicializa el consumible con el daño y el rango máximo del rayo."""
         self.damage = damage
@@ -169,21 +175,22 @@ class LightningDamageConsumable(Consumable):
         """Activa el consumible y lanza un rayo al enemigo más cercano."""
         consumer = action.entity  # Actor que usa el consumible.
         target = None  # Enemigo al que se le lanzará el rayo.
-        closest_distance = self.maximum_range + 1.0  # Establece una distancia máxima mayor que el rango.
-
-        # Busca al enemigo más cercano dentro del rango máximo.
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor  # Establece el objetivo como el enemigo más cercano.
-                    closest_distance = distance
+        game_map = self.engine.game_map
+
+        # Distancias al cuadrado desde el consumidor hasta cada actor a la vista, calculadas de una vez.
+        dx = game_map.visible_actor_xs - consumer.x
+        dy = game_map.visible_actor_ys - consumer.y
+        distances = dx * dx + dy * dy
+        # Candidatos: dentro del rango (distancia menor que el rango + 1) y distintos del propio consumidor.
+        in_range = (distances > 0) & (distances < (self.maximum_range + 1) ** 2)
+        if in_range.any():
+            # El más cercano de los candidatos; a igualdad de distancia, el primero, como en el recorrido original.
+            target = game_map.visible_actors[np.argmin(np.where(in_range, distances, np.iinfo(distances.dtype).max))]
 
         # Si se ha encontrado un objetivo, lanza el rayo.
         if target:
-            self.engine.message_log.add_message(
-                f"Un rayo golpea al {target.name} con gran estruendo. Hace {self.damage} de dano."
+            self.engine.message_log.add_message_lazy(
+                "Un rayo golpea al %s con gran estruendo. Hace %d de dano.", target.name, self.damage
             )
             target.fighter.take_damage(self.damage)  # Aplica el daño al enemigo.
             self.consume()
@@ -193,18 +200,14 @@ class LightningDamageConsumable(Consumable):
 class DefensiveScrollConsumable(Consumable):
     """Consumible que aumenta la defensa del jugador durante un número de turnos."""
 
+    __slots__ = ("defense_bonus", "number_of_turns")
+
     def __init__(self, defense_bonus: int, number_of_turns: int):
         self.defense_bonus = defense_bonus
         self.number_of_turns = number_of_turns
 
-    def get_action(self, consumer: Actor) -> Optional[ActionOrHandler]:
-        return actions.ItemAction(consumer, self.parent)
-
     def activate(self, action: actions.ItemAction) -> None:
-        consumer = action.entity  # Aseguramos que consumer sea el actor que usa el ítem.
-
-        if not isinstance(consumer, Actor):  # Validamos que sea un Actor.
-            raise exceptions.Impossible("Solo el jugador puede usar este pergamino.")
+        consumer = action.entity  # Actor que usa el ítem (los ítems solo se usan desde el inventario de un actor).
 
         # Aumenta la defensa del jugador temporalmente.
         consumer.fighter.activate_defense_bonus(self.defense_bonus, self.number_of_turns)
@@ -218,6 +221,8 @@ class DefensiveScrollConsumable(Consumable):
 class InvisibilityScrollConsumable(Consumable):
     """Consumible que hace al jugador invisible durante un número de turnos."""
 
+    __slots__ = ("number_of_turns",)
+
     def __init__(self, number_of_turns: int):
         """Inicializa el consumible con el número de turnos de invisibilidad."""
         self.number_of_turns = number_of_turns
@@ -226,9 +231,6 @@ class InvisibilityScrollConsumable(Consumable):
         """Activa el consumible y hace al jugador invisible."""
         consumer = action.entity
 
-        if not isinstance(consumer, Actor):
-            raise exceptions.Impossible("Solo el jugador puede usar este pergamino.")
-
         consumer.invisibility_turns = self.number_of_turns  # Establece los turnos de invisibilidad.
         self.engine.message_log.add_message(
             f"{consumer.name} se desvanece en el aire, volviendose invisible durante {self.number_of_turns} turnos.",
@@ -6,9 +6,10 @@ proporciona funciones para equipar y desquitar ítems, y generar mensajes relaci
 con estos cambios (por ejemplo, cuando un ítem es equipado o desequipado).
 """
 from __future__ import annotations  # Se asegura de que las anotaciones de tipo que contienen referencias a clases se resuelvan correctamente.
-from typing import Optional, TYPE_CHECKING  # Importa las herramientas necesarias para anotaciones de tipo condicional y opcional.
+from typing import List, Optional, Tuple, TYPE_CHECKING  # Importa las herramientas necesarias para anotaciones de tipo condicional y opcional.
 from components.base_component import BaseComponent  # Importa la clase base para los componentes de entidad.
 from equipment_types import EquipmentType  # Importa el tipo de equipo para diferenciar armas y armaduras.
+from pickle_state import state_values  # Une en un diccionario el estado guardado (con o sin __slots__).
 
 # Este bloque solo importa las clases cuando se está realizando una comprobación de tipos, no se ejecuta en tiempo de ejecución.
 if TYPE_CHECKING:
@@ -16,6 +17,10 @@ if TYPE_CHECKING:
 
 class Equipment(BaseComponent):
     """Componente que gestiona el equipo (armas y armaduras) de un actor."""
+
+    # Las ranuras se guardan en una lista indexada por 'EquipmentType - 1'; añadir un tipo de equipo no requiere más atributos.
+    __slots__ = ("_slots", "_defense_bonus_total", "_power_bonus_total")
+
     parent: Actor  # Se refiere al actor que tiene este componente de equipo.
 
     def __init__(self, weapon: Optional[Item] = None, armor: Optional[Item] = None):
@@ -25,52 +30,81 @@ class Equipment(BaseComponent):
         :param weapon: El ítem de tipo arma que se equipa (opcional).
         :param armor: El ítem de tipo armadura que se equipa (opcional).
         """
-        self.weapon = weapon  # Arma equipada, si hay alguna.
-        self.armor = armor  # Armadura equipada, si hay alguna.
+        self._slots: List[Optional[Item]] = [None] * len(EquipmentType)  # Una ranura por tipo de equipo.
+        self._slots[EquipmentType.WEAPON - 1] = weapon  # Arma equipada, si hay alguna.
+        self._slots[EquipmentType.ARMOR - 1] = armor  # Armadura equipada, si hay alguna.
+        # Totales de las bonificaciones del equipo: se calculan aquí una vez y se actualizan al equipar o desequipar.
+        self._defense_bonus_total, self._power_bonus_total = self._sum_bonuses()
 
-    @property
-    def defense_bonus(self) -> int:
+    def __setstate__(self, state) -> None:
         """
-        Devuelve la bonificación total de defensa del equipo (suma de las bonificaciones de armamento y armadura).
+        Restaura el equipo al cargar una partida. Las partidas antiguas guardaban 'weapon' y 'armor' como atributos
+        y no guardaban los totales: se pasan a la lista de ranuras y los totales se calculan a partir del equipo cargado.
+        """
+        values = state_values(state)
+        slots = values.pop("_slots", None)
+        if slots is None:
+            slots = [None] * len(EquipmentType)
+            slots[EquipmentType.WEAPON - 1] = values.pop("weapon", None)
+            slots[EquipmentType.ARMOR - 1] = values.pop("armor", None)
+        values["_slots"] = slots
+        super().__setstate__(values)
+        self._defense_bonus_total, self._power_bonus_total = self._sum_bonuses()
 
-        Esta propiedad calcula el bono de defensa considerando tanto el arma equipada como la armadura equipada,
-        si es que existen.
+    @property
+    def weapon(self) -> Optional[Item]:
+        """Arma equipada, si hay alguna."""
+        return self._slots[EquipmentType.WEAPON - 1]
 
-        :return: La bonificación total de defensa.
+    @property
+    def armor(self) -> Optional[Item]:
+        """Armadura equipada, si hay alguna."""
+        return self._slots[EquipmentType.ARMOR - 1]
+
+    @staticmethod
+    def _item_bonuses(item: Optional[Item]) -> Tuple[int, int]:
+        """Devuelve las bonificaciones (defensa, poder) de un ítem, o (0, 0) si no hay ítem o no es equipable."""
+        if item is None:
+            return 0, 0
+        equippable = item.equippable
+        if equippable is None:
+            return 0, 0
+        return equippable.defense_bonus, equippable.power_bonus
+
+    def _sum_bonuses(self) -> Tuple[int, int]:
+        """Recorre las ranuras y suma sus bonificaciones (solo al crear o cargar el componente)."""
+        defense = power = 0
+        for item in self._slots:
+            item_defense, item_power = self._item_bonuses(item)
+            defense += item_defense
+            power += item_power
+        return defense, power
+
+    def bonuses(self) -> Tuple[int, int]:
         """
-        bonus = 0  # Inicializa la bonificación total de defensa.
+        Devuelve a la vez las bonificaciones totales de defensa y de poder del equipo.
 
-        # Si el arma equipada tiene una bonificación de defensa, se añade al bonus total.
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
+        :return: Una tupla (bonificación de defensa, bonificación de poder).
+        """
+        return self._defense_bonus_total, self._power_bonus_total
 
-        # Si la armadura equipada tiene una bonificación de defensa, se añade al bonus total.
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense_bonus
+    @property
+    def defense_bonus(self) -> int:
+        """
+        Devuelve la bonificación total de defensa del equipo (suma de las bonificaciones de armamento y armadura).
 
-        return bonus  # Devuelve el bono de defensa total.
+        :return: La bonificación total de defensa.
+        """
+        return self._defense_bonus_total
 
     @property
     def power_bonus(self) -> int:
         """
         Devuelve la bonificación total de poder del equipo (suma de las bonificaciones de armamento y armadura).
 
-        Similar a la bonificación de defensa, pero calcula el bono de poder considerando las bonificaciones
-        de las armas y armaduras equipadas.
-
         :return: La bonificación total de poder.
         """
-        bonus = 0  # Inicializa la bonificación total de poder.
-
-        # Si el arma equipada tiene una bonificación de poder, se añade al bonus total.
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.power_bonus
-
-        # Si la armadura equipada tiene una bonificación de poder, se añade al bonus total.
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.power_bonus
-
-        return bonus  # Devuelve el bono de poder total.
+        return self._power_bonus_total
 
     def item_is_equipped(self, item: Item) -> bool:
         """
@@ -81,7 +115,10 @@ class Equipment(BaseComponent):
         :param item: El ítem a verificar.
         :return: Verdadero si el ítem está equipado, de lo contrario Falso.
         """
-        return self.weapon == item or self.armor == item  # Verifica si el ítem está en el arma o la armadura equipada.
+        for equipped in self._slots:
+            if equipped is item:  # Cada ítem es único: basta con comparar la identidad.
+                return True
+        return False
 
     def unequip_message(self, item_name: str) -> None:
         """
@@ -91,7 +128,7 @@ class Equipment(BaseComponent):
 
         :param item_name: El nombre del ítem desquitado.
         """
-        self.parent.gamemap.engine.message_log.add_message(
+        self.message_log.add_message(
             f"Te has quitado {item_name}."  # Añade el mensaje correspondiente al registro.
         )
 
@@ -103,47 +140,63 @@ class Equipment(BaseComponent):
 
         :param item_name: El nombre del ítem equipado.
         """
-        self.parent.gamemap.engine.message_log.add_message(
+        self.message_log.add_message(
             f"Te has equipado {item_name}."  # Añade el mensaje correspondiente al registro.
         )
 
-    def equip_to_slot(self, slot: str, item: Item, add_message: bool) -> None:
+    def equip_to_slot(self, slot: EquipmentType, item: Item, add_message: bool) -> None:
         """
         Equipa un ítem al slot especificado (arma o armadura).
 
         Este método coloca un ítem en un slot específico (ya sea para un arma o armadura) y maneja la
         lógica de desquitar el ítem actual si es necesario.
 
-        :param slot: El nombre del slot en el que se va a equipar el ítem (arma o armadura).
+        :param slot: El tipo de equipo del slot en el que se va a equipar el ítem (arma o armadura).
         :param item: El ítem a equipar.
         :param add_message: Indica si debe agregarse un mensaje al registro (si es True, se agrega el mensaje).
         """
-        current_item = getattr(self, slot)  # Obtiene el ítem actual en el slot especificado.
+        current_item = self._slots[slot - 1]  # Obtiene el ítem actual en el slot especificado.
 
         if current_item is not None:
             self.unequip_from_slot(slot, add_message)  # Si hay un ítem actual, se desquita antes de equipar el nuevo.
 
-        setattr(self, slot, item)  # Asigna el nuevo ítem al slot especificado.
+        self._slots[slot - 1] = item  # Asigna el nuevo ítem al slot especificado.
+        self._add_bonuses(item, 1)  # Suma las bonificaciones del ítem que entra.
+        self._stats_changed()
 
         if add_message:
             self.equip_message(item.name)  # Muestra un mensaje indicando que el ítem fue equipado.
 
-    def unequip_from_slot(self, slot: str, add_message: bool) -> None:
+    def unequip_from_slot(self, slot: EquipmentType, add_message: bool) -> None:
         """
         Desquita el ítem de un slot (arma o armadura).
 
         El método permite desquitar un ítem de un slot (arma o armadura) y maneja la lógica de agregar
         mensajes al registro si se requiere.
 
-        :param slot: El nombre del slot del que se va a desquitar el ítem (arma o armadura).
+        :param slot: El tipo de equipo del slot del que se va a desquitar el ítem (arma o armadura).
         :param add_message: Indica si se debe agregar un mensaje al registro (si es True, se agrega el mensaje).
         """
-        current_item = getattr(self, slot)  # Obtiene el ítem actual en el slot especificado.
+        current_item = self._slots[slot - 1]  # Obtiene el ítem actual en el slot especificado.
 
         if add_message and current_item is not None:
             self.unequip_message(current_item.name)  # Muestra un mensaje si hay un ítem que desquitar.
 
-        setattr(self, slot, None)  # Desquita el ítem del slot especificado.
+        self._slots[slot - 1] = None  # Desquita el ítem del slot especificado.
+        self._add_bonuses(current_item, -1)  # Resta las bonificaciones del ítem que sale.
+        self._stats_changed()
+
+    def _add_bonuses(self, item: Optional[Item], sign: int) -> None:
+        """Suma (sign=1) o resta (sign=-1) las bonificaciones de un ítem a los totales del equipo."""
+        defense, power = self._item_bonuses(item)
+        self._defense_bonus_total += sign * defense
+        self._power_bonus_total += sign * power
+
+    def _stats_changed(self) -> None:
+        """Avisa al componente de combate del actor de que sus bonificaciones de equipo han cambiado."""
+        fighter = self.parent.fighter
+        if fighter is not None:
+            fighter.invalidate_stats()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
         """
@@ -156,16 +209,13 @@ class Equipment(BaseComponent):
         :param equippable_item: El ítem que se va a equipar o desquitar.
         :param add_message: Indica si se debe agregar un mensaje al registro (si es True, se agrega el mensaje).
         """
-        if (
-            equippable_item.equippable
-            and equippable_item.equippable.equipment_type == EquipmentType.WEAPON
-        ):
-            slot = "weapon"  # Si el ítem es un arma, se asigna al slot de "weapon".
-        else:
-            slot = "armor"  # Si el ítem es una armadura, se asigna al slot de "armor".
+        # El slot es directamente el tipo de equipo del ítem (los ítems sin tipo van a la armadura, como antes).
+        equippable = equippable_item.equippable
+        slot = equippable.equipment_type if equippable else EquipmentType.ARMOR
+        current_item = self._slots[slot - 1]
 
-        # Si el ítem ya está equipado en ese slot, lo desquita; de lo contrario, lo equipa.
-        if getattr(self, slot) == equippable_item:
+        # Si el ítem ya está equipado en ese slot, lo desquita; de lo contrario, lo equipa (se compara la identidad).
+        if current_item is equippable_item:
             self.unequip_from_slot(slot, add_message)
         else:
             self.equip_to_slot(slot, equippable_item, add_message)
\ No newline at end of file
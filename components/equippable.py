@@ -6,69 +6,68 @@ Así, cada objeto influye en las habilidades o estadísticas de los personajes q
 """
 
 from __future__ import annotations # Se asegura de que las anotaciones de tipo que contienen referencias a clases se resuelvan correctamente.
-from typing import TYPE_CHECKING # Importamos TYPE_CHECKING para realizar comprobaciones de tipos solo durante la fase de desarrollo.
+from dataclasses import dataclass # Importamos dataclass para definir el equipable como un registro inmutable.
+from typing import Dict, Tuple # Importamos los tipos para anotar la tabla de equipables.
 from components.base_component import BaseComponent # Importamos la clase base 'BaseComponent' que sirve como clase base para todos los componentes en el sistema.
+from pickle_state import restore_state # Restaura el estado guardado (con o sin __slots__) al cargar una partida.
 from equipment_types import EquipmentType # Importamos el enum 'EquipmentType' que define los diferentes tipos de equipo que puede existir (arma, armadura, etc.)
 
-# Importación condicional para la clase 'Item', que solo ocurre en la fase de comprobación de tipos, mejorando la eficiencia en tiempo de ejecución.
-if TYPE_CHECKING:
-    from entity import Item  # Importa la clase Item para usarla como tipo en el componente Equippable
-
 # Clase principal que representa a los objetos equipables. Esta clase hereda de BaseComponent.
+@dataclass(frozen=True, slots=True)
 class Equippable(BaseComponent):
-    """Componente que representa un objeto que puede ser equipado, como armas o armaduras."""
-
-    # Definimos el atributo 'parent', que hace referencia al objeto 'Item' al que pertenece este componente equipable.
-    parent: Item
-
-    def __init__(
-        self,
-        equipment_type: EquipmentType,  # Tipo de equipo, que puede ser un arma, una armadura, etc.
-        power_bonus: int = 0,  # Bono de poder, utilizado solo para armas (por defecto es 0)
-        defense_bonus: int = 0,  # Bono de defensa, utilizado solo para armaduras (por defecto es 0)
-    ):
-        """Inicializa un objeto equipable con su tipo y los bonos de poder y defensa."""
-        
-        # Asignamos el tipo de equipo (arma, armadura, etc.)
-        self.equipment_type = equipment_type
-        
-        # Asignamos el bono de poder para armas, que por defecto es 0.
-        self.power_bonus = power_bonus
-        
-        # Asignamos el bono de defensa para armaduras, que por defecto es 0.
-        self.defense_bonus = defense_bonus
-
-class Dagger(Equippable):
-    """Clase que representa una daga (objeto equipable de tipo 'arma')."""
-
-    def __init__(self) -> None:
-        """Inicializa una daga con un bono de poder de 2."""
-        # Llamamos al constructor de la clase base 'Equippable' con el tipo de equipo WEAPON y un bono de poder de 2.
-        super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=2)
-
-
-class Sword(Equippable):
-    """Clase que representa una espada (objeto equipable de tipo 'arma')."""
-
-    def __init__(self) -> None:
-        """Inicializa una espada con un bono de poder de 4."""
-        # Llamamos al constructor de la clase base 'Equippable' con el tipo de equipo WEAPON y un bono de poder de 4.
-        super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=4)
-
-
-class LeatherArmor(Equippable):
-    """Clase que representa una armadura de cuero (objeto equipable de tipo 'armadura')."""
-
-    def __init__(self) -> None:
-        """Inicializa una armadura de cuero con un bono de defensa de 1."""
-        # Llamamos al constructor de la clase base 'Equippable' con el tipo de equipo ARMOR y un bono de defensa de 1.
-        super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=1)
-
-
-class ChainMail(Equippable):
-    """Clase que representa una cota de malla (objeto equipable de tipo 'armadura')."""
-
-    def __init__(self) -> None:
-        """Inicializa una cota de malla con un bono de defensa de 3."""
-        # Llamamos al constructor de la clase base 'Equippable' con el tipo de equipo ARMOR y un bono de defensa de 3.
-        super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=3)
\ No newline at end of file
+    """
+    Componente que representa un objeto que puede ser equipado, como armas o armaduras.
+
+    Es inmutable, así que varios ítems pueden compartir la misma instancia. Por eso no tiene 'parent':
+    quien lo usa ya tiene el ítem a mano (p. ej. Equipment.weapon/armor). Copiarlo (p. ej. con el
+    deepcopy de Entity.spawn) devuelve la misma instancia.
+    """
+
+    equipment_type: EquipmentType  # Tipo de equipo, que puede ser un arma, una armadura, etc.
+    power_bonus: int = 0  # Bono de poder, utilizado solo para armas (por defecto es 0)
+    defense_bonus: int = 0  # Bono de defensa, utilizado solo para armaduras (por defecto es 0)
+
+    def __copy__(self) -> Equippable:
+        """Los equipables no cambian: la copia es la propia instancia."""
+        return self
+
+    def __deepcopy__(self, memo) -> Equippable:
+        """Igual que __copy__: al clonar un ítem se sigue compartiendo su equipable."""
+        return self
+
+    def __reduce__(self):
+        """Se guarda como la llamada al constructor con sus tres campos."""
+        return self.__class__, (self.equipment_type, self.power_bonus, self.defense_bonus)
+
+    def __setstate__(self, state) -> None:
+        """Carga partidas antiguas, en las que el estado era un diccionario (con 'parent', que ya no se usa)."""
+        # La clase es inmutable: se salta su __setattr__ y solo se restauran sus campos.
+        restore_state(self, state, setter=object.__setattr__, fields=("equipment_type", "power_bonus", "defense_bonus"))
+
+
+# Tabla de equipables: nombre -> (tipo de equipo, bono de poder, bono de defensa).
+# Para ajustar el equilibrio del juego basta con cambiar los valores aquí.
+EQUIPPABLE_DEFS: Dict[str, Tuple[EquipmentType, int, int]] = {
+    "dagger": (EquipmentType.WEAPON, 2, 0),  # Daga: +2 de poder.
+    "sword": (EquipmentType.WEAPON, 4, 0),  # Espada: +4 de poder.
+    "leather_armor": (EquipmentType.ARMOR, 0, 1),  # Armadura de cuero: +1 de defensa.
+    "chain_mail": (EquipmentType.ARMOR, 0, 3),  # Cota de malla: +3 de defensa.
+}
+
+_equippables: Dict[str, Equippable] = {}  # Instancias ya creadas, una por nombre de la tabla.
+
+
+def make_equippable(name: str) -> Equippable:
+    """Devuelve el equipable de la tabla con ese nombre. Todos los ítems del mismo tipo comparten la instancia."""
+    equippable = _equippables.get(name)
+    if equippable is None:
+        equipment_type, power_bonus, defense_bonus = EQUIPPABLE_DEFS[name]
+        equippable = _equippables[name] = Equippable(equipment_type, power_bonus, defense_bonus)
+    return equippable
+
+
+def __getattr__(name: str):
+    """Las partidas guardadas antiguas referencian las clases Dagger, Sword, LeatherArmor y ChainMail, ya eliminadas."""
+    if name in ("Dagger", "Sword", "LeatherArmor", "ChainMail"):
+        return Equippable  # El estado guardado ya incluye el tipo y los bonos.
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,9 +5,8 @@ También implementa funcionalidades como curar al actor, recibir daño, activar
 """
 
 from __future__ import annotations  # Permite usar anotaciones de tipo con cadenas para clases no definidas aún.
-from typing import TYPE_CHECKING  # Importa TYPE_CHECKING para importaciones que solo se usan en la verificación de tipos.
+from typing import Optional, TYPE_CHECKING  # Importa TYPE_CHECKING para importaciones que solo se usan en la verificación de tipos.
 from components.base_component import BaseComponent  # Importa la clase BaseComponent, de la que hereda Fighter.
-from render_order import RenderOrder  # Importa el enum RenderOrder para controlar el orden de renderización de los actores.
 
 import color  # Importa el módulo 'color' que gestiona los colores para los mensajes de log.
 import os  # Importa el módulo 'os' para manejar operaciones del sistema de archivos.
@@ -19,6 +18,11 @@ if TYPE_CHECKING:
 class Fighter(BaseComponent):
     """Componente que representa las estadísticas de combate de un Actor (salud, defensa, poder de ataque)."""
 
+    __slots__ = (
+        "max_hp", "_hp", "base_defense", "base_power", "defensive_turns", "defense_bonus_turns", "temp_defense_bonus",
+        "_defense_cache", "_power_cache", "_defensive_message", "_can_die",
+    )
+
     parent: Actor  # El Actor al que pertenece este componente Fighter
 
     def __init__(self, hp: int, base_defense: int, base_power: int):
@@ -30,6 +34,27 @@ class Fighter(BaseComponent):
         self.defensive_turns = 0  # Turnos restantes de inmunidad al daño.
         self.defense_bonus_turns = 0  # Turnos restantes del bono de defensa.
         self.temp_defense_bonus = 0  # Bono de defensa temporal.
+        self._defense_cache: Optional[int] = None  # Defensa total ya calculada (None si hay que recalcularla).
+        self._power_cache: Optional[int] = None  # Poder total ya calculado (None si hay que recalcularlo).
+        self._defensive_message: Optional[str] = None  # Mensaje del modo defensivo, creado al activarlo.
+        self._can_die = True  # Pasa a False en die(): un cadáver no vuelve a morir.
+
+    def __setstate__(self, state) -> None:
+        """Las partidas antiguas no guardaban los totales: se recalculan en el primer acceso."""
+        self._defense_cache = None
+        self._power_cache = None
+        self._defensive_message = None
+        super().__setstate__(state)
+        if not hasattr(self, "_can_die"):
+            self._can_die = self._hp > 0  # En partidas antiguas, solo los actores con salud siguen vivos.
+
+    def invalidate_stats(self) -> None:
+        """
+        Descarta la defensa y el poder totales guardados. Debe llamarse siempre que cambie algo de lo que dependen:
+        los valores base, el equipo o el bono de defensa temporal.
+        """
+        self._defense_cache = None
+        self._power_cache = None
 
     @property
     def hp(self) -> int:
@@ -39,19 +64,27 @@ class Fighter(BaseComponent):
     @hp.setter
     def hp(self, value: int) -> None:
         """Establece la salud, asegurando que no sea menor que 0 ni mayor que la salud máxima."""
-        self._hp = max(0, min(value, self.max_hp))  # Limita la salud entre 0 y el valor máximo
-        if self._hp == 0 and self.parent.ai:
+        max_hp = self.max_hp
+        # Limita la salud entre 0 y el valor máximo con dos comparaciones en lugar de min() y max().
+        hp = self._hp = 0 if value < 0 else (max_hp if value > max_hp else value)
+        if not hp and self._can_die:
             self.die()  # Si la salud llega a 0, el actor muere
 
     @property
     def defense(self) -> int:
-        """Obtiene la defensa total del actor, incluyendo el bono temporal."""
-        return self.base_defense + self.defense_bonus + self.temp_defense_bonus
+        """Obtiene la defensa total del actor, incluyendo el bono temporal. Se calcula solo tras un cambio."""
+        defense = self._defense_cache
+        if defense is None:
+            defense = self._defense_cache = self.base_defense + self.defense_bonus + self.temp_defense_bonus
+        return defense
 
     @property
     def power(self) -> int:
         """Obtiene el poder de ataque total del actor, sumando el poder base y el bono de poder de equipo."""
-        return self.base_power + self.power_bonus
+        power = self._power_cache
+        if power is None:
+            power = self._power_cache = self.base_power + self.power_bonus
+        return power
 
     @property
     def defense_bonus(self) -> int:
@@ -85,43 +118,39 @@ class Fighter(BaseComponent):
             death_message = f"{self.parent.name} esta muerto"
             death_message_color = color.enemy_die
 
-        # Cambia el carácter del actor para reflejar que está muerto
-        self.parent.char = "%"
-        self.parent.color = (191, 0, 0)  # Rojo para indicar que está muerto
-        self.parent.blocks_movement = False  # Deja que los demás actores pasen por él
-        self.parent.ai = None  # El actor deja de tener IA
-        self.parent.render_order = RenderOrder.CORPSE  # Lo marca como cadáver para la renderización
+        self._can_die = False  # Se marca antes de nada para que no pueda morir dos veces.
+
+        gamemap = self.gamemap
+        gamemap.remove_entity(self.parent)  # Lo saca de los índices del mapa mientras cambia su estado
+
+        self.parent.mark_dead()  # Lo convierte en cadáver: deja de bloquear el paso y pierde la IA
+        gamemap.add_entity(self.parent)  # Vuelve a registrarlo en el mapa, ya como cadáver
 
         # Muestra el mensaje de muerte en el log
-        self.engine.message_log.add_message(death_message, death_message_color)
+        self.message_log.add_message(death_message, death_message_color)
 
         # El jugador gana experiencia por matar al actor (si el actor muerto tiene experiencia asignada)
         self.engine.player.level.add_xp(self.parent.level.xp_given)
 
     def heal(self, amount: int) -> int:
         """Recupera salud al actor, hasta el máximo de salud."""
-        if self.hp == self.max_hp:
+        hp = self._hp
+        # Lo recuperado no puede superar lo que falta hasta la salud máxima.
+        amount_recovered = min(amount, self.max_hp - hp)
+        if amount_recovered <= 0:
             return 0  # Si ya está al máximo, no se recupera nada
 
-        new_hp_value = self.hp + amount  # Calcula la nueva salud
-
-        # Asegura que la nueva salud no exceda el máximo
-        if new_hp_value > self.max_hp:
-            new_hp_value = self.max_hp
-
-        amount_recovered = new_hp_value - self.hp  # Calcula la cantidad recuperada
-
-        self.hp = new_hp_value  # Establece la nueva salud
+        self.hp = hp + amount_recovered  # Establece la nueva salud
 
         return amount_recovered  # Retorna la cantidad recuperada
 
     def take_damage(self, amount: int) -> None:
         """Reduce la salud del actor por la cantidad de daño recibido."""
         if self.defensive_turns > 0:
-            self.engine.message_log.add_message(
-                f"{self.parent.name} ignora el dano gracias al efecto defensivo.",
-                color.status_effect_applied,
-            )
+            message = self._defensive_message
+            if message is None:  # Partidas guardadas con el modo defensivo ya activo.
+                message = self._defensive_message = f"{self.parent.name} ignora el dano gracias al efecto defensivo."
+            self.message_log.add_message(message, color.status_effect_applied)
             return  # Ignora el daño si está en modo defensivo.
 
         self.hp -= amount  # Reduce la salud según el daño recibido
@@ -129,21 +158,29 @@ class Fighter(BaseComponent):
     def activate_defensive_mode(self, turns: int) -> None:
         """Activa el modo defensivo, ignorando daño por un número de turnos."""
         self.defensive_turns = turns
+        # El mensaje solo depende del nombre: se formatea una vez en lugar de en cada golpe ignorado.
+        self._defensive_message = f"{self.parent.name} ignora el dano gracias al efecto defensivo."
 
     def activate_defense_bonus(self, bonus: int, turns: int) -> None:
         """Activa un bono de defensa temporal."""
         self.temp_defense_bonus += bonus
         self.defense_bonus_turns = turns
+        self.invalidate_stats()
 
     def on_turn_end(self) -> None:
         """Se ejecuta al final de cada turno, reduciendo los turnos restantes de inmunidad al daño."""
+        # Caso habitual: ningún efecto temporal activo, así que no hay nada que descontar ni que avisar.
+        if not (self.defensive_turns or self.defense_bonus_turns or self.temp_defense_bonus):
+            return
+
         if self.defensive_turns > 0:
             self.defensive_turns -= 1
         if self.defense_bonus_turns > 0:
             self.defense_bonus_turns -= 1
         if self.defense_bonus_turns == 0 and self.temp_defense_bonus > 0:
-            self.engine.message_log.add_message(
+            self.message_log.add_message(
                 f"{self.parent.name} siente que su piel vuelve a la normalidad.",
                 color.status_effect_applied,
             )
-            self.temp_defense_bonus = 0  # Elimina el bono de defensa temporal.
\ No newline at end of file
+            self.temp_defense_bonus = 0  # Elimina el bono de defensa temporal.
+            self.invalidate_stats()
\ No newline at end of file
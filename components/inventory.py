@@ -5,7 +5,7 @@ que tiene una capacidad máxima de objetos.
 """
 
 from __future__ import annotations # Permite usar anotaciones de tipo con cadenas para clases no definidas aún.
-from typing import List, TYPE_CHECKING # Importa herramientas para el manejo de tipos en el código.
+from typing import Dict, TYPE_CHECKING # Importa herramientas para el manejo de tipos en el código.
 from components.base_component import BaseComponent # Importa la clase BaseComponent que será la clase base de todos los componentes
 
 # Importación condicional para las clases Actor e Item solo durante la comprobación de tipos
@@ -17,16 +17,43 @@ if TYPE_CHECKING:
 class Inventory(BaseComponent):
     """Componente que gestiona el inventario de un Actor."""
 
+    __slots__ = ("capacity", "items")
+
     parent: Actor  # Actor al que pertenece este componente de inventario
 
     def __init__(self, capacity: int):
         """
-        Inicializa el inventario con una capacidad dada y una lista vacía de objetos.
+        Inicializa el inventario con una capacidad dada y sin objetos.
 
         :param capacity: Capacidad máxima que puede contener el inventario.
         """
         self.capacity = capacity  # Capacidad máxima del inventario
-        self.items: List[Item] = []  # Lista de objetos que el actor tiene en el inventario
+        # Objetos que el actor tiene en el inventario. Se usa un diccionario (sin valores) porque conserva el orden
+        # de inserción, como una lista, pero permite eliminar un objeto sin recorrer los demás.
+        self.items: Dict[Item, None] = {}
+
+    def __setstate__(self, state) -> None:
+        """Restaura el inventario, convirtiendo la lista de objetos de las partidas antiguas en un diccionario."""
+        super().__setstate__(state)
+        if isinstance(self.items, list):
+            self.items = dict.fromkeys(self.items)
+
+    def add(self, item: Item) -> None:
+        """
+        Añade un objeto al final del inventario y lo asigna como su padre.
+
+        :param item: El objeto que se va a añadir.
+        """
+        item.parent = self
+        self.items[item] = None
+
+    def remove(self, item: Item) -> None:
+        """
+        Elimina un objeto del inventario sin devolverlo al mapa (por ejemplo, al consumirlo).
+
+        :param item: El objeto que se va a eliminar.
+        """
+        del self.items[item]
 
     def drop(self, item: Item) -> None:
         """
@@ -36,11 +63,11 @@ class Inventory(BaseComponent):
 
         :param item: El objeto que se va a soltar.
         """
-        # Elimina el objeto del inventario, lo cual modifica la lista de 'items'
-        self.items.remove(item) 
+        # Elimina el objeto del inventario
+        self.remove(item)
 
         # Coloca el objeto en las coordenadas actuales del actor en el mapa de juego
         item.place(self.parent.x, self.parent.y, self.gamemap)
 
         # Registra en el log del juego que el actor ha soltado el objeto
-        self.engine.message_log.add_message(f"Has soltado {item.name}.")
+        self.message_log.add_message(f"Has soltado {item.name}.")
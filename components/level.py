@@ -14,7 +14,9 @@ if TYPE_CHECKING:
 
 class Level(BaseComponent):
     """Componente que gestiona el nivel, la experiencia y el aumento de nivel de un Actor."""
-    
+
+    __slots__ = ("current_level", "current_xp", "level_up_base", "level_up_factor", "xp_given", "_xp_to_next", "_pending_xp")
+
     parent: Actor  # Actor al que pertenece este componente de nivel
 
     def __init__(
@@ -31,11 +33,24 @@ class Level(BaseComponent):
         self.level_up_base = level_up_base
         self.level_up_factor = level_up_factor
         self.xp_given = xp_given
+        self._xp_to_next = self._compute_xp_to_next()  # Solo cambia al subir de nivel.
+        self._pending_xp = 0  # Experiencia ganada que aún no se ha anunciado en el registro de mensajes.
+
+    def __setstate__(self, state) -> None:
+        """Las partidas antiguas no guardaban la experiencia necesaria ni la pendiente: se calculan al cargar."""
+        super().__setstate__(state)
+        self._xp_to_next = self._compute_xp_to_next()
+        if not hasattr(self, "_pending_xp"):
+            self._pending_xp = 0
+
+    def _compute_xp_to_next(self) -> int:
+        """Calcula la experiencia necesaria para subir del nivel actual al siguiente."""
+        return self.level_up_base + self.current_level * self.level_up_factor
 
     @property
     def experience_to_next_level(self) -> int:
-        """Calcula la experiencia necesaria para subir al siguiente nivel."""
-        return self.level_up_base + self.current_level * self.level_up_factor
+        """Devuelve la experiencia necesaria para subir al siguiente nivel (se calcula al crear el componente y al subir de nivel)."""
+        return self._xp_to_next
 
     @property
     def requires_level_up(self) -> bool:
@@ -49,21 +64,35 @@ class Level(BaseComponent):
 
         self.current_xp += xp  # Suma la experiencia
 
-        # Mensaje de log para informar de la experiencia ganada
-        self.engine.message_log.add_message(f"Has ganado {xp} puntos de experiencia.")
+        # La experiencia se acumula y se anuncia con un único mensaje al final del turno (flush_xp), en lugar de
+        # un mensaje por cada muerte.
+        self._pending_xp += xp
 
-        # Si el actor ha alcanzado suficiente experiencia para subir de nivel
+        # Si el actor ha alcanzado suficiente experiencia para subir de nivel (se comprueba en el acto con
+        # current_xp, sin esperar al mensaje)
         if self.requires_level_up:
-            # Informa sobre el nivel alcanzado
-            self.engine.message_log.add_message(
-                f"Has subido al nivel {self.current_level + 1}!"
-            )
+            message_log = self.message_log
+            with message_log.batch():  # La experiencia y la subida de nivel se agregan juntas al registro
+                self.flush_xp()  # La experiencia acumulada se anuncia antes de la subida de nivel
+                # Informa sobre el nivel alcanzado
+                message_log.add_message(
+                    f"Has subido al nivel {self.current_level + 1}!"
+                )
+
+    def flush_xp(self) -> None:
+        """Añade al registro de mensajes la experiencia acumulada desde el último aviso, si hay alguna."""
+        if not self._pending_xp:
+            return  # Ya se anunció (p. ej. al subir de nivel)
+        xp, self._pending_xp = self._pending_xp, 0
+        # Mensaje de log para informar de la experiencia ganada
+        self.message_log.add_message(f"Has ganado {xp} puntos de experiencia.")
 
     def increase_level(self) -> None:
         """Aumenta el nivel del actor, deduciendo la experiencia necesaria."""
         self.current_xp -= self.experience_to_next_level  # Resta la experiencia usada para subir de nivel
 
         self.current_level += 1  # Incrementa el nivel
+        self._xp_to_next = self._compute_xp_to_next()  # El siguiente nivel pide más experiencia
 
     def increase_max_hp(self, amount: int = 20) -> None:
         """Aumenta la salud máxima del actor (y la salud actual) cuando sube de nivel."""
@@ -71,24 +100,26 @@ class Level(BaseComponent):
         self.parent.fighter.hp += amount  # Restaura la salud al máximo
 
         # Mensaje de log indicando que el actor se siente más vigoroso
-        self.engine.message_log.add_message("Te sientes con mas vigor.")
+        self.message_log.add_message("Te sientes con mas vigor.")
 
         self.increase_level()  # Aumenta el nivel del actor después de mejorar su salud
 
     def increase_power(self, amount: int = 1) -> None:
         """Aumenta el poder de ataque base del actor cuando sube de nivel."""
         self.parent.fighter.base_power += amount  # Aumenta el poder de ataque
+        self.parent.fighter.invalidate_stats()  # El poder total debe recalcularse
 
         # Mensaje de log indicando que el actor se siente más fuerte
-        self.engine.message_log.add_message("Te sientes mas fuerte.")
+        self.message_log.add_message("Te sientes mas fuerte.")
 
         self.increase_level()  # Aumenta el nivel del actor después de mejorar su poder
 
     def increase_defense(self, amount: int = 1) -> None:
         """Aumenta la defensa base del actor cuando sube de nivel."""
         self.parent.fighter.base_defense += amount  # Aumenta la defensa base
+        self.parent.fighter.invalidate_stats()  # La defensa total debe recalcularse
 
         # Mensaje de log indicando que el actor se siente más robusto
-        self.engine.message_log.add_message("Te sientes mas robusto.")
+        self.message_log.add_message("Te sientes mas robusto.")
 
-        self.increase_level()  # Aumenta el nivel del actor después de mejorar su defensa
\ No newline at end of file
+        self.increase_level()  # Aumenta el nivel del actor después de mejorar su defensa
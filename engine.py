@@ -3,27 +3,120 @@ Este módulo gestiona la lógica principal del juego, incluyendo el manejo de tu
 """
 
 from __future__ import annotations  # Permite la anotación de tipos con clases que aún no están definidas.
-from typing import TYPE_CHECKING, Callable  # Importa TYPE_CHECKING para la comprobación de tipos en tiempo de desarrollo.
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple  # Importa TYPE_CHECKING para la comprobación de tipos en tiempo de desarrollo.
 from tcod.console import Console  # Importa la clase Console de la biblioteca tcod para la salida gráfica.
 from tcod.map import compute_fov  # Importa compute_fov para calcular el campo de visión (FOV).
-from components.base_component import BaseComponent  # Importa la clase base para componentes.
+from tcod import libtcodpy  # Importa libtcodpy para las constantes de libtcod (algoritmos de FOV).
 from message_log import MessageLog  # Importa el sistema de registro de mensajes.
 
+import heapq  # Importa heapq para mantener las tareas programadas ordenadas por turno.
 import lzma  # Importa el módulo lzma para la compresión de datos.
+import os  # Importa os para reemplazar el archivo de guardado de forma atómica.
 import pickle  # Importa el módulo pickle para la serialización de objetos.
+import struct  # Importa struct para la cabecera binaria de las partidas guardadas.
+import threading  # Importa threading para escribir las partidas guardadas en segundo plano.
 import tcod  # Importa la biblioteca tcod para gráficos y operaciones relacionadas con el juego.
 import tcod.event  # Asegúrate de que tcod.event esté importado
 import color  # Importa el módulo de colores personalizados.
 import exceptions  # Importa las excepciones personalizadas.
 import render_functions  # Importa funciones de renderizado personalizadas.
+from pickle_state import restore_state  # Restaura el estado guardado (con o sin __slots__) al cargar una partida.
 
 # Este bloque solo importa las clases cuando se está realizando una comprobación de tipos, no se ejecuta en tiempo de ejecución.
 if TYPE_CHECKING:
     from entity import Actor  # Importa la clase Actor (para el jugador y enemigos).
     from game_map import GameMap, GameWorld  # Importa las clases GameMap y GameWorld.
 
+# Se mantiene tomado mientras se escribe un archivo de guardado, para que dos guardados no se pisen y para que
+# cargar una partida espere a que termine de escribirse. Está a nivel de módulo porque el motor se serializa
+# y un Lock no se puede guardar con pickle.
+_save_lock = threading.Lock()
+
+
+def wait_for_saves() -> None:
+    """Espera a que termine cualquier guardado en segundo plano (se llama antes de cargar una partida)."""
+    with _save_lock:
+        pass
+
+
+# Formato de las partidas: cabecera (firma y número de búferes), longitudes del pickle y de cada búfer, el pickle
+# (protocolo 5) y después la memoria de los arrays de numpy del mapa, que pickle deja fuera del flujo (out-of-band).
+SAVE_MAGIC = b"RGTHSAV5"  # Firma de las partidas con este formato; las antiguas son un único pickle.
+_SAVE_HEADER = struct.Struct("<8sI")  # Firma y número de búferes.
+_SAVE_LENGTH = struct.Struct("<Q")  # Longitud en bytes del pickle o de un búfer.
+
+
+def _serialize_save(engine: Engine, copy_buffers: bool) -> Tuple[bytes, List[memoryview]]:
+    """
+    Serializa el motor con el protocolo 5. Los arrays de numpy (tiles, visible, explored...) no se copian dentro
+    del pickle: se devuelven aparte como vistas de su memoria. Con copy_buffers se copian, para que el resultado
+    no cambie aunque el juego siga modificando el mapa (autoguardado en otro hilo).
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(engine, protocol=5, buffer_callback=buffers.append)
+    raws = [buffer.raw() for buffer in buffers]  # Vistas de bytes de la memoria de cada array.
+    if copy_buffers:
+        raws = [memoryview(bytes(raw)) for raw in raws]
+    return data, raws
+
+
+def _write_save_stream(f, data: bytes, buffers: List[memoryview]) -> None:
+    """Escribe la cabecera, el pickle y los búferes, en ese orden, en un archivo ya abierto (comprimido)."""
+    f.write(_SAVE_HEADER.pack(SAVE_MAGIC, len(buffers)))
+    for part in (data, *buffers):
+        f.write(_SAVE_LENGTH.pack(len(part)))
+    f.write(data)
+    for buffer in buffers:
+        f.write(buffer)  # lzma comprime directamente la memoria del array, sin copiarla antes al pickle.
+
+
+def _read_exact(f, size: int) -> bytearray:
+    """Lee exactamente 'size' bytes en un bytearray (escribible, para que los arrays cargados también lo sean)."""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    read = 0
+    while read < size:
+        count = f.readinto(view[read:])
+        if not count:
+            raise EOFError("Partida guardada incompleta.")
+        read += count
+    return buffer
+
+
+def read_save(f) -> object:
+    """Lee una partida de un archivo ya abierto (descomprimido). Acepta también el formato antiguo (un solo pickle)."""
+    header = f.read(_SAVE_HEADER.size)
+    if len(header) < _SAVE_HEADER.size or header[:len(SAVE_MAGIC)] != SAVE_MAGIC:
+        f.seek(0)  # Partida antigua: el archivo es un pickle sin cabecera.
+        return pickle.load(f)
+    _, count = _SAVE_HEADER.unpack(header)
+    lengths = [_SAVE_LENGTH.unpack(f.read(_SAVE_LENGTH.size))[0] for _ in range(count + 1)]
+    data = _read_exact(f, lengths[0])
+    buffers = [_read_exact(f, length) for length in lengths[1:]]
+    return pickle.loads(data, buffers=buffers)
+
+
+def _write_save(filename: str, save_data: bytes, buffers: List[memoryview]) -> None:
+    """Comprime y escribe en disco una partida ya serializada. Se ejecuta en el hilo de autoguardado."""
+    try:
+        temp_filename = filename + ".tmp"
+        with lzma.open(temp_filename, "wb") as f:
+            _write_save_stream(f, save_data, buffers)
+        os.replace(temp_filename, filename)  # Sustituye la partida anterior solo cuando la nueva está completa.
+    finally:
+        _save_lock.release()  # Lo tomó autosave() en el hilo principal.
+
 # Clase principal que gestiona la lógica del juego.
 class Engine:
+    # Todos los atributos del motor; sin __dict__, el acceso (p. ej. self.player en cada fotograma) es más rápido.
+    __slots__ = (
+        "message_log", "player", "context", "console", "turn_count", "scheduled_tasks", "_task_seq",
+        "last_player_name", "_fov_key", "game_map", "game_world", "mouse_location",
+        "_frame", "_dirty", "_hud", "_hud_key",
+    )
+    # Atributos que solo sirven para la sesión actual y no se guardan en la partida.
+    _TRANSIENT_ATTRS = ("_fov_key", "_frame", "_dirty", "_hud", "_hud_key")
+
     game_map: GameMap  # El mapa actual del juego.
     game_world: GameWorld  # El mundo de juego (contiene varios niveles).
 
@@ -31,24 +124,69 @@ class Engine:
         """Inicializa el motor del juego con el jugador, contexto y consola."""
         self.message_log = MessageLog()  # Crea un objeto para registrar los mensajes del juego.
         self.player = player  # Asigna el jugador al motor del juego.
+        player.attack_color = color.player_atk  # Los ataques del jugador se muestran con su propio color.
         self.context = context  # Asigna el contexto de tcod.
         self.console = console  # Asigna la consola de tcod.
         self.turn_count = 0  # Inicializa el contador de turnos en 0
-        self.scheduled_tasks = []  # Lista para almacenar tareas programadas
+        # Montículo (heapq) de tareas programadas: (turno, número de orden, función). El número de orden
+        # desempata las tareas del mismo turno, que así se ejecutan en el orden en que se programaron.
+        self.scheduled_tasks: List[Tuple[int, int, Callable]] = []
+        self._task_seq = 0  # Siguiente número de orden para las tareas programadas.
         self.last_player_name = player.name  # Guarda el nombre del jugador inicial
+        self._fov_key: Optional[Tuple[int, int, GameMap]] = None  # Posición y mapa del último FOV calculado.
+        self._reset_render_cache()
+
+    def _reset_render_cache(self) -> None:
+        """Prepara la caché del último fotograma dibujado (vacía: el primer render dibuja todo)."""
+        self._frame: Optional[Console] = None  # Consola fuera de pantalla con el último fotograma del juego.
+        self._dirty = True  # Si es True, algo ha cambiado y el fotograma se vuelve a dibujar.
+        self._hud: Optional[Console] = None  # Consola fuera de pantalla con el registro de mensajes y las barras.
+        self._hud_key: Optional[Tuple[int, ...]] = None  # Valores con los que se dibujó el HUD por última vez.
+
+    def mark_dirty(self) -> None:
+        """Indica que el estado del juego ha cambiado y el siguiente render debe redibujar el fotograma."""
+        self._dirty = True
+
+    def __getstate__(self) -> dict:
+        """Guarda los atributos del motor, sin las cachés de la sesión (FOV y fotograma dibujado)."""
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if name not in self._TRANSIENT_ATTRS and hasattr(self, name)
+        }
+
+    def __setstate__(self, state) -> None:
+        """
+        Restaura el motor al cargar una partida. Las partidas antiguas guardaban las tareas como (turno, función)
+        en una lista: se pasan al montículo con su número de orden.
+        """
+        values = restore_state(self, state)
+        self._fov_key = None  # El FOV se recalcula siempre tras cargar.
+        self._reset_render_cache()
+        if "_task_seq" not in values:
+            tasks = [(task_turn, seq, callback) for seq, (task_turn, callback) in enumerate(self.scheduled_tasks)]
+            heapq.heapify(tasks)
+            self.scheduled_tasks = tasks
+            self._task_seq = len(tasks)
+        # El motor es la raíz de la partida guardada: cuando pickle llega aquí, todas las entidades ya tienen su
+        # estado y se pueden indexar por posición.
+        game_map = getattr(self, "game_map", None)
+        if game_map is not None:
+            game_map.rebuild_indices()
 
     def schedule_task(self, turns: int, callback: Callable) -> None:
         """Programa una tarea para ejecutarse después de un número de turnos."""
-        self.scheduled_tasks.append((self.turn_count + turns, callback))
+        heapq.heappush(self.scheduled_tasks, (self.turn_count + turns, self._task_seq, callback))
+        self._task_seq += 1
 
     def process_scheduled_tasks(self) -> None:
         """Procesa y ejecuta las tareas programadas si es el turno adecuado."""
+        tasks = self.scheduled_tasks
         current_turn = self.turn_count  # Obtiene el turno actual.
-        for task in list(self.scheduled_tasks):  # Itera sobre las tareas programadas.
-            task_turn, callback = task  # Desempaqueta el turno y la función de la tarea.
-            if current_turn >= task_turn:  # Verifica si es el turno adecuado.
-                callback()  # Ejecuta la tarea.
-                self.scheduled_tasks.remove(task)  # Elimina la tarea de la lista.
+        # La tarea más próxima está siempre en tasks[0]: se sacan mientras ya les toque, sin recorrer las demás.
+        while tasks and tasks[0][0] <= current_turn:
+            _, _, callback = heapq.heappop(tasks)
+            callback()  # Ejecuta la tarea.
 
     def increment_turn(self) -> None:
         """Incrementa el contador de turnos."""
@@ -64,23 +202,92 @@ class Engine:
                     color.status_effect_applied,
                 )
 
-        for entity in set(self.game_map.actors) - {self.player}:  # Itera sobre los enemigos.
-            if entity.ai:  # Verifica si el enemigo tiene inteligencia artificial.
-                entity.ai.perform()  # Ejecuta la acción del enemigo.
+        game_map = self.game_map
+        game_map.paths_frozen = True  # Todos los enemigos comparten un mismo mapa de distancias este turno.
+        game_map.paths_frozen_version = game_map.blockers_version  # Los mapas de turnos anteriores no se reutilizan.
+        try:
+            # Copia de los enemigos que mantiene el mapa: si uno muere durante el bucle sale de `enemies`, y su IA
+            # ya es None cuando le llega el turno.
+            for entity in tuple(game_map.enemies):
+                ai = entity.ai
+                if ai and not ai.is_idle():  # Omite a los enemigos sin IA o que no harían nada este turno.
+                    ai.perform()  # Ejecuta la acción del enemigo.
+        finally:
+            game_map.paths_frozen = False  # El siguiente turno vuelve a tener en cuenta los bloqueos actuales.
+
+    def invalidate_fov(self) -> None:
+        """Obliga a recalcular el FOV en la siguiente llamada a update_fov (p. ej. si cambia la transparencia de los tiles)."""
+        self._fov_key = None
 
     def update_fov(self) -> None:
-        """Recalcula el área visible basado en la posición del jugador."""
-        self.game_map.visible[:] = compute_fov(  # Calcula el campo de visión (FOV).
-            self.game_map.tiles["transparent"],  # Usa los tiles transparentes del mapa.
-            (self.player.x, self.player.y),  # La posición del jugador.
-            radius=8,  # Radio del campo de visión.
-        )
-        self.game_map.explored |= self.game_map.visible  # Marca como explorado lo visible.
+        """
+        Recalcula el área visible basado en la posición del jugador.
+
+        Si el jugador sigue en la misma casilla del mismo mapa y los tiles no han cambiado, el FOV es el mismo
+        y no se vuelve a calcular. La lista de actores a la vista sí se actualiza siempre, porque los enemigos se mueven.
+        """
+        game_map = self.game_map
+        fov_key = self._fov_key
+        player_x, player_y = self.player.x, self.player.y
+        if fov_key is None or fov_key[0] != player_x or fov_key[1] != player_y or fov_key[2] is not game_map:
+            game_map.visible[:] = compute_fov(  # Calcula el campo de visión (FOV).
+                game_map.tiles["transparent"],  # Usa los tiles transparentes del mapa.
+                (player_x, player_y),  # La posición del jugador.
+                radius=8,  # Radio del campo de visión.
+                algorithm=libtcodpy.FOV_SYMMETRIC_SHADOWCAST,  # El algoritmo más rápido de libtcod.
+            )
+            game_map.explored |= game_map.visible  # Marca como explorado lo visible.
+            self._fov_key = (player_x, player_y, game_map)
+        game_map.refresh_visible_actors()  # Actualiza la lista de actores a la vista para este turno.
+        self._dirty = True  # Tras cada turno el mapa puede haber cambiado (enemigos, visión).
 
     def render(self, console: Console) -> None:
-        """Renderiza la pantalla del juego."""
-        self.game_map.render(console)  # Dibuja el mapa del juego.
+        """
+        Renderiza la pantalla del juego.
+
+        El juego se dibuja en una consola fuera de pantalla que se conserva entre fotogramas. El mapa solo se vuelve
+        a dibujar cuando algo ha cambiado (mark_dirty o un turno nuevo), y la zona inferior (registro de mensajes,
+        barras y piso) se dibuja en su propia consola solo cuando cambian los valores que muestra. En los demás
+        fotogramas (p. ej. al mover el ratón) basta con copiar el fotograma a la consola principal con blit.
+        """
+        message_log = self.message_log
+        message_log.flush()  # Vuelca los mensajes diferidos antes de dibujar el registro.
+
+        frame = self._frame
+        if frame is None or frame.width != console.width or frame.height != console.height:
+            frame = self._frame = Console(console.width, console.height, order="F")
+            self._hud = Console(console.width, console.height, order="F")
+            self._hud_key = None
+            self._dirty = True
+
+        fighter = self.player.fighter
+        level = self.player.level
+        hud_key = (
+            fighter.hp, fighter.max_hp, level.current_xp, level.experience_to_next_level,
+            self.game_world.current_floor, message_log.version,
+        )
+        hud_changed = hud_key != self._hud_key
+        if hud_changed:
+            self._hud.clear()
+            self._render_hud(self._hud)
+            self._hud_key = hud_key
 
+        map_changed = self._dirty
+        if map_changed:
+            frame.clear()
+            self.game_map.render(frame)  # Dibuja el mapa del juego.
+            self._dirty = False
+
+        if map_changed or hud_changed:
+            # Copia la zona inferior, bajo el mapa, desde la consola del HUD (una sola copia de memoria).
+            hud_y = self.game_map.height
+            self._hud.blit(
+                frame, dest_x=0, dest_y=hud_y, src_x=0, src_y=hud_y, width=frame.width, height=frame.height - hud_y,
+            )
+        frame.blit(console)  # Copia el fotograma completo a la consola principal.
+
+    def _render_hud(self, console: Console) -> None:
+        """Dibuja el registro de mensajes, las barras de estado y el piso actual en la consola dada."""
         self.message_log.render(console=console, x=21, y=45, width=40, height=5)  # Renderiza el registro de mensajes.
 
         render_functions.render_bar(  # Renderiza la barra de salud del jugador.
@@ -110,31 +317,68 @@ class Engine:
         self.context = None  # Elimina el contexto del motor.
         self.console = None  # Elimina la consola del motor.
 
+        # El pickle queda pequeño porque los arrays del mapa van fuera de él: lzma comprime su memoria directamente,
+        # sin copiarla antes al pickle. Se escribe en un temporal y se reemplaza al final para que un fallo a mitad
+        # de guardado no deje la partida anterior a medio sobrescribir.
+        temp_filename = filename + ".tmp"
+        try:
+            with _save_lock:  # Espera a que termine un autoguardado en curso.
+                save_data, buffers = _serialize_save(self, copy_buffers=False)
+                with lzma.open(temp_filename, "wb") as f:  # Abre el archivo comprimido en modo escritura binaria.
+                    _write_save_stream(f, save_data, buffers)
+                os.replace(temp_filename, filename)
+        finally:
+            self.context = context  # Restaura el contexto.
+            self.console = console  # Restaura la consola.
+
+    def autosave(self, filename: str) -> None:
+        """
+        Guarda la partida sin bloquear el juego: el estado se serializa aquí, en el hilo principal (el juego no puede
+        cambiar mientras tanto), y la compresión y la escritura, que son lo más lento, se hacen en otro hilo.
+        Al salir del juego se usa save_as, que es síncrono.
+        """
+        context = self.context  # Excluye el contexto temporalmente.
+        console = self.console  # Excluye la consola temporalmente.
+        self.context = None
+        self.console = None
         try:
-            save_data = lzma.compress(pickle.dumps(self))  # Serializa y comprime el estado del motor.
-            with open(filename, "wb") as f:  # Abre el archivo en modo escritura binaria.
-                f.write(save_data)  # Escribe los datos en el archivo.
+            save_data, buffers = _serialize_save(self, copy_buffers=True)  # Copia del estado en este momento.
         finally:
             self.context = context  # Restaura el contexto.
             self.console = console  # Restaura la consola.
 
+        # El candado se toma aquí y lo suelta el hilo al terminar, así que una carga o un guardado posteriores
+        # siempre esperan a este, aunque el hilo aún no haya empezado.
+        _save_lock.acquire()
+        try:
+            # No es un hilo daemon: si se cierra el juego, Python espera a que termine de escribir el archivo.
+            threading.Thread(target=_write_save, args=(filename, save_data, buffers), name="autosave").start()
+        except BaseException:
+            _save_lock.release()
+            raise
+
     def handle_events(self, events: list[tcod.event.Event]) -> None:
         """Maneja los eventos del juego, incluyendo el guardado al salir."""
+        dispatch = EngineEventDispatch(self).dispatch  # Un solo despachador para toda la cola de eventos.
         for event in events:  # Itera sobre los eventos.
-            if isinstance(event, tcod.event.Quit):  # Verifica si el evento es de tipo Quit.
-                if self.player.is_alive:  # Verifica si el jugador está vivo.
-                    self.save_as("savegame.sav")  # Guarda la partida automáticamente.
-                    self.message_log.add_message("Partida guardada automáticamente al salir.", color.welcome_text)
-                raise SystemExit()  # Sale del juego.
-
-class Actor:
-    @property
-    def is_alive(self) -> bool:
-        """El jugador está vivo si tiene puntos de vida positivos."""
-        return self.hp > 0  # Verifica si los puntos de vida son mayores a 0.
-
-class Fighter(BaseComponent):
-    def die(self) -> None:
-        if self.engine.player is self.parent:  # Verifica si el jugador es el que muere.
-            original_name = self.parent.name  # Guarda el nombre original del jugador.
-            self.engine.last_player_name = original_name  # Asigna el nombre original al atributo.
\ No newline at end of file
+            dispatch(event)
+
+    def _on_quit(self) -> None:
+        """Guarda la partida (si el jugador sigue vivo) y sale del juego."""
+        if self.player.is_alive:  # Verifica si el jugador está vivo.
+            self.save_as("savegame.sav")  # Guarda la partida automáticamente.
+            self.message_log.add_message("Partida guardada automáticamente al salir.", color.welcome_text)
+        raise SystemExit()  # Sale del juego.
+
+
+class EngineEventDispatch(tcod.event.EventDispatch[None]):
+    """
+    Despachador de los eventos que gestiona el propio motor. tcod llama al método ev_* que corresponde al tipo
+    de cada evento, así que añadir un tipo nuevo es añadir un método, sin una cadena de isinstance.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def ev_quit(self, event: tcod.event.Quit) -> None:
+        self.engine._on_quit()
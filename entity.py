@@ -10,6 +10,7 @@ from render_order import RenderOrder # Importa el orden de renderizado para las
 import copy # Importa el módulo copy para crear copias profundas de objetos.
 import math # Importa el módulo math para operaciones matemáticas.
 import color # Importa el módulo de colores personalizados.
+from pickle_state import restore_state  # Restaura el estado guardado (con o sin __slots__) al cargar una partida.
 
 
 # Esto es para evitar errores de referencia circular, ya que estos módulos se importan más abajo en el código.
@@ -32,6 +33,9 @@ class Entity:
     Un objeto genérico para representar jugadores, enemigos, ítems, etc.
     """
 
+    # Sin __dict__: hay una entidad por cada actor, ítem y cadáver del mapa.
+    __slots__ = ("parent", "x", "y", "char", "color", "name", "blocks_movement", "render_order")
+
     parent: Union[GameMap, Inventory]  # El objeto al que pertenece (puede ser un mapa o inventario).
 
     def __init__(
@@ -57,7 +61,11 @@ class Entity:
         # Si el objeto tiene un padre (por ejemplo, un mapa), se lo asigna
         if parent:
             self.parent = parent  # Asigna el padre
-            parent.entities.add(self)  # Añade este objeto a la lista de entidades del padre
+            parent.add_entity(self)  # Añade este objeto a la lista de entidades del padre
+
+    def __setstate__(self, state) -> None:
+        """Restaura el estado al cargar una partida o al copiar la entidad."""
+        restore_state(self, state)
 
     @property
     def gamemap(self) -> GameMap:
@@ -69,19 +77,23 @@ class Entity:
         clone.x = x  # Asigna la nueva posición
         clone.y = y
         clone.parent = gamemap  # Asigna el nuevo mapa como el padre
-        gamemap.entities.add(clone)  # Añade el clon al mapa de juego
+        gamemap.add_entity(clone)  # Añade el clon al mapa de juego
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """Coloca este objeto en una nueva ubicación dentro del mapa."""
-        self.x = x  # Actualiza la posición X
-        self.y = y  # Actualiza la posición Y
         if gamemap:
             if hasattr(self, "parent"):  # Verifica si el objeto tiene un padre
                 if self.parent is self.gamemap:  # Si el padre es el mapa actual
-                    self.gamemap.entities.remove(self)  # Elimina al objeto del mapa anterior
+                    self.gamemap.remove_entity(self)  # Elimina al objeto del mapa anterior
+            gamemap.remove_entity(self)  # Por si el nuevo mapa ya lo contenía (con su posición anterior)
+            self.x = x  # Actualiza la posición X
+            self.y = y  # Actualiza la posición Y
             self.parent = gamemap  # Asigna el nuevo mapa como padre
-            gamemap.entities.add(self)  # Añade el objeto al nuevo mapa
+            gamemap.add_entity(self)  # Añade el objeto al nuevo mapa
+        else:
+            self.x = x  # Actualiza la posición X
+            self.y = y  # Actualiza la posición Y
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -89,14 +101,27 @@ class Entity:
         """
         return math.sqrt((x - self.x) ** 2 + (y - self.y) ** 2)  # Calcula la distancia euclidiana
 
+    def distance_squared(self, x: int, y: int) -> int:
+        """
+        Devuelve el cuadrado de la distancia entre este objeto y un punto dado en el mapa.
+        Sirve para comparar distancias sin calcular la raíz cuadrada.
+        """
+        dx = x - self.x
+        dy = y - self.y
+        return dx * dx + dy * dy
+
     def move(self, dx: int, dy: int) -> None:
         # Mueve el objeto por una cantidad dada de píxeles (dx, dy)
-        self.x += dx  # Actualiza la posición X
-        self.y += dy  # Actualiza la posición Y
+        self.gamemap.move_entity(self, self.x + dx, self.y + dy)  # Actualiza la posición y los índices del mapa
 
 
 # La clase Actor hereda de Entity y representa personajes jugables o enemigos.
 class Actor(Entity):
+    __slots__ = ("ai", "equipment", "fighter", "inventory", "level", "invisibility_turns", "attack_color")
+
+    attack_color: Tuple[int, int, int]  # Color de sus mensajes de ataque; el motor lo cambia para el jugador.
+    DEFAULT_ATTACK_COLOR = color.enemy_atk  # Color de ataque de los actores que no son el jugador.
+
     def __init__(
         self,
         *,
@@ -136,6 +161,12 @@ class Actor(Entity):
         self.level.parent = self  # Asigna el actor como "padre" del nivel
 
         self.invisibility_turns = 0  # Contador de turnos de invisibilidad
+        self.attack_color = self.DEFAULT_ATTACK_COLOR  # Color de sus mensajes de ataque (el del jugador lo pone el motor)
+
+    def __setstate__(self, state) -> None:
+        """Las partidas antiguas no guardaban el color de ataque: los actores cargados usan el de los enemigos."""
+        self.attack_color = self.DEFAULT_ATTACK_COLOR
+        super().__setstate__(state)
 
     @property
     def invisible(self) -> bool:
@@ -147,9 +178,20 @@ class Actor(Entity):
         """Devuelve True si este actor está vivo y puede realizar acciones."""
         return bool(self.ai)  # Un actor está vivo si tiene una IA asociada.
 
+    def mark_dead(self) -> None:
+        """
+        Convierte al actor en un cadáver: cambia su aspecto, deja de bloquear el paso y pierde la IA.
+        Reúne en un solo sitio todo lo que define a un cadáver.
+        """
+        self.char, self.color, self.blocks_movement, self.ai, self.render_order = (
+            "%", (191, 0, 0), False, None, RenderOrder.CORPSE,  # Rojo para indicar que está muerto.
+        )
+
 
 # La clase Item también hereda de Entity y representa objetos consumibles, armamentos, etc.
 class Item(Entity):
+    __slots__ = ("consumable", "equippable")
+
     def __init__(
         self,
         *,
@@ -175,22 +217,5 @@ class Item(Entity):
         if self.consumable:
             self.consumable.parent = self  # Asigna el ítem como "padre" del consumible
 
-        self.equippable = equippable  # Asigna el objeto equipable
-
-        if self.equippable:
-            self.equippable.parent = self  # Asigna el ítem como "padre" del equipable
-
-
-def handle_enemy_turns(self) -> None:
-    """Maneja los turnos de los enemigos y reduce el contador de invisibilidad del jugador."""
-    if self.player.invisibility_turns > 0:
-        self.player.invisibility_turns -= 1
-        if self.player.invisibility_turns == 0:
-            self.message_log.add_message(
-                f"{self.player.name} vuelve a ser visible.",
-                color.status_effect_applied,
-            )
+        self.equippable = equippable  # Asigna el objeto equipable (puede estar compartido entre varios ítems, no tiene padre)
 
-    for entity in set(self.game_map.actors) - {self.player}:
-        if entity.ai:
-            entity.ai.perform()
\ No newline at end of file
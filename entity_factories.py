@@ -112,14 +112,14 @@ dagger = Item(
     char="/",  # Carácter que representa la daga.
     color=(0, 191, 255),  # Color azul claro.
     name="Daga",  # Nombre del objeto.
-    equippable=equippable.Dagger()  # La daga es un objeto equipable.
+    equippable=equippable.make_equippable("dagger")  # La daga es un objeto equipable.
 )
 
 sword = Item(
     char="/",  # Carácter que representa la espada.
     color=(105, 105, 105),  # Color gris oscuro.
     name="Espada",  # Nombre del objeto.
-    equippable=equippable.Sword()  # La espada es un objeto equipable.
+    equippable=equippable.make_equippable("sword")  # La espada es un objeto equipable.
 )
 
 # Se crean armaduras equipables.
@@ -127,12 +127,12 @@ leather_armor = Item(
     char="[",  # Carácter que representa la armadura de cuero.
     color=(139, 69, 19),  # Color marrón.
     name="Armadura de cuero",  # Nombre del objeto.
-    equippable=equippable.LeatherArmor(),  # La armadura de cuero es un objeto equipable.
+    equippable=equippable.make_equippable("leather_armor"),  # La armadura de cuero es un objeto equipable.
 )
 
 chain_mail = Item(
     char="[",  # Carácter que representa la cota de malla.
     color=(105, 105, 105),  # Color gris oscuro.
     name="Armadura de hierro",  # Nombre del objeto.
-    equippable=equippable.ChainMail()  # La cota de malla es un objeto equipable.
+    equippable=equippable.make_equippable("chain_mail")  # La cota de malla es un objeto equipable.
 )
\ No newline at end of file
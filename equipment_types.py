@@ -1,7 +1,9 @@
-from enum import auto, Enum # Importación de módulos para trabajar con enumeraciones.
+from enum import auto, IntEnum # Importación de módulos para trabajar con enumeraciones.
 
 # Definición de un tipo de enumeración llamado EquipmentType, que representa los tipos de equipo que un personaje puede usar.
-class EquipmentType(Enum):
+# Es un IntEnum con valores consecutivos (1, 2, ...) para que Equipment pueda guardar sus ranuras en una lista y acceder
+# a ellas con 'tipo - 1'. Los valores no se cambian a 0, 1, ... porque las partidas guardadas los almacenan.
+class EquipmentType(IntEnum):
     # Asigna automáticamente un valor único para cada tipo de equipo
     WEAPON = auto()  # Representa un arma, el valor será asignado automáticamente (1, por ejemplo)
     ARMOR = auto()    # Representa una armadura, el valor también será asignado automáticamente (2, por ejemplo)
@@ -8,10 +8,13 @@ GameWorld se encarga de generar nuevos pisos y gestionar las configuraciones del
 from __future__ import annotations
 
 # Importa tipos de datos para anotaciones de tipo y chequeo de tipos en tiempo de desarrollo.
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
 # Importa la librería numpy para manipular arrays de forma eficiente.
 import numpy as np  # type: ignore
+# Importa tcod para el cálculo de caminos.
+import tcod
 # Importa la clase Console de tcod para renderizar la consola en pantalla.
 from tcod.console import Console
 
@@ -24,6 +27,25 @@ if TYPE_CHECKING:
     from engine import Engine  # Importa la clase Engine.
     from entity import Entity  # Importa la clase Entity.
 
+# Atributos derivados que no se guardan en la partida; se reconstruyen al cargarla.
+_CACHE_ATTRS = (
+    "items_by_pos", "actor_grid", "blocker_grid", "blockers_version",
+    "_base_cost", "_cost_scratch", "_distance_field", "_distance_field_key",
+    "_blocker_slots", "_blocker_entities", "_blocker_xs", "_blocker_ys", "_walkable_padded",
+    "actors_version", "_actor_arrays", "_actor_arrays_version", "_path_cost_version",
+    "_path_cache", "_path_cache_version", "paths_frozen", "paths_frozen_version", "_flow_field", "_flow_field_key",
+    "visible_actors", "visible_actor_xs", "visible_actor_ys", "_enemies",
+)
+
+UNREACHABLE = np.iinfo(np.int32).max  # Valor de las casillas inalcanzables en los mapas de distancias.
+PATH_CACHE_SIZE = 256  # Número máximo de caminos memorizados por mapa.
+
+# Desplazamiento de cada dirección del mapa de flujo; el índice es el valor guardado en cada casilla.
+FLOW_DIRECTIONS: Tuple[Tuple[int, int], ...] = (
+    (0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1),
+)
+FLOW_NONE = len(FLOW_DIRECTIONS)  # Casillas sin paso posible: el propio destino o las inalcanzables.
+
 # Clase que representa el mapa del juego.
 class GameMap:
     def __init__(
@@ -32,7 +54,10 @@ class GameMap:
         # Inicializa el mapa con sus dimensiones, entidades y tiles.
         self.engine = engine  # Referencia al motor del juego.
         self.width, self.height = width, height  # Dimensiones del mapa.
-        self.entities = set(entities)  # Conjunto de entidades en el mapa.
+        self.entities = set()  # Conjunto de entidades en el mapa.
+        self._reset_caches()
+        for entity in entities:
+            self.add_entity(entity)
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")  # Mapa de tiles, por defecto todo es una pared.
 
         # Matrices que controlan lo que el jugador puede ver y lo que ha explorado.
@@ -45,6 +70,163 @@ class GameMap:
 
         self.downstairs_location = (0, 0)  # Ubicación de las escaleras hacia abajo.
 
+    def _reset_caches(self) -> None:
+        """Inicializa los índices espaciales y las cachés derivadas de los tiles."""
+        self.items_by_pos: Dict[Tuple[int, int], List[Item]] = {}  # Índice de ítems por posición (x, y).
+        self.actor_grid: Dict[Tuple[int, int], Actor] = {}  # Índice de actores vivos por posición (x, y).
+        self.blocker_grid: Dict[Tuple[int, int], Entity] = {}  # Índice de entidades que bloquean por posición (x, y).
+        self._base_cost: Optional[np.ndarray] = None  # Costes de movimiento de los tiles, sin entidades.
+        self._cost_scratch: Optional[np.ndarray] = None  # Buffer reutilizable para los costes con entidades.
+        self._path_cost_version = -1  # Versión de bloqueos con la que se rellenó el buffer de costes.
+        # Caminos ya calculados, por (origen_x, origen_y, destino_x, destino_y), válidos para una versión de bloqueos.
+        self._path_cache: OrderedDict[Tuple[int, int, int, int], Tuple[Tuple[int, int], ...]] = OrderedDict()
+        self._path_cache_version = -1
+        self._walkable_padded: Optional[np.ndarray] = None  # Casillas caminables con un borde de paredes alrededor.
+        self.blockers_version = 0  # Se incrementa cada vez que cambia alguna entidad que bloquea.
+        self._distance_field: Optional[np.ndarray] = None  # Mapa de Dijkstra hacia el último destino pedido.
+        self._distance_field_key: Optional[Tuple[int, int, int]] = None  # Destino y versión de bloqueos del mapa.
+        self.paths_frozen = False  # Si es True, el mapa de distancias no se recalcula al moverse los bloqueos.
+        self.paths_frozen_version = -1  # Versión de bloqueos al empezar el turno de los enemigos en curso.
+        self._flow_field: Optional[np.ndarray] = None  # Dirección del siguiente paso hacia el destino en cada casilla.
+        self._flow_field_key: Optional[Tuple[int, int, int]] = None  # Clave del mapa de distancias del que se obtuvo.
+        # Posiciones de las entidades que bloquean en arrays paralelos, actualizados en cada movimiento.
+        self._blocker_slots: Dict[Entity, int] = {}  # Índice de cada entidad dentro de los arrays.
+        self._blocker_entities: List[Entity] = []  # Entidad que ocupa cada índice de los arrays.
+        self._blocker_xs = np.empty(16, dtype=np.intp)  # Coordenadas X (solo son válidas las primeras N).
+        self._blocker_ys = np.empty(16, dtype=np.intp)  # Coordenadas Y (solo son válidas las primeras N).
+        self.actors_version = 0  # Se incrementa cada vez que cambia algún actor vivo del índice.
+        self._actor_arrays: Optional[Tuple[List[Actor], np.ndarray, np.ndarray]] = None  # Actores y sus posiciones.
+        self._actor_arrays_version = -1  # Versión de actores con la que se construyeron esos arrays.
+        self.visible_actors: List[Actor] = []  # Actores vivos en casillas visibles, según el último cálculo del FOV.
+        self.visible_actor_xs = np.empty(0, dtype=np.intp)  # Coordenadas X de `visible_actors`, en el mismo orden.
+        self.visible_actor_ys = np.empty(0, dtype=np.intp)  # Coordenadas Y de `visible_actors`, en el mismo orden.
+        # Actores vivos que no son el jugador, en orden de llegada (diccionario sin valores). Se crea en el primer
+        # acceso a `enemies`, porque al cargar una partida el motor (y su jugador) aún no está restaurado.
+        self._enemies: Optional[Dict[Actor, None]] = None
+
+    def __getstate__(self) -> dict:
+        """Excluye los índices y cachés al guardar; se reconstruyen al cargar."""
+        state = self.__dict__.copy()
+        for attr in _CACHE_ATTRS:
+            state.pop(attr, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restaura el mapa con los índices vacíos. Mientras pickle sigue cargando la partida, las entidades aún pueden
+        no tener su estado (posición, componentes), así que los índices los reconstruye el motor con
+        `rebuild_indices` cuando ya está cargado todo.
+        """
+        self.__dict__.update(state)
+        self._reset_caches()
+
+    def rebuild_indices(self) -> None:
+        """Reconstruye los índices espaciales a partir de las entidades del mapa (al terminar de cargar una partida)."""
+        entities = self.entities
+        self.entities = set()
+        self._reset_caches()
+        for entity in entities:
+            self.add_entity(entity)
+        self.refresh_visible_actors()
+
+    def invalidate_tiles(self) -> None:
+        """Descarta las cachés derivadas de los tiles. Debe llamarse tras modificar `tiles` durante la partida."""
+        self._base_cost = None
+        self._cost_scratch = None
+        self._walkable_padded = None
+        self._distance_field = None
+        self._flow_field = None
+        self._path_cache.clear()
+        self.engine.invalidate_fov()  # La transparencia de los tiles también puede haber cambiado.
+
+    def add_entity(self, entity: Entity) -> None:
+        """Añade una entidad al mapa y la registra en los índices espaciales."""
+        self.entities.add(entity)
+        self._index_entity(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Elimina una entidad del mapa y de los índices espaciales. No hace nada si no está en el mapa."""
+        if entity not in self.entities:
+            return
+        self._unindex_entity(entity)
+        self.entities.remove(entity)
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        """Cambia la posición de una entidad del mapa manteniendo actualizados los índices espaciales."""
+        self._unindex_entity(entity, moving=True)
+        entity.x = x  # Actualiza la posición X
+        entity.y = y  # Actualiza la posición Y
+        self._index_entity(entity, moving=True)
+
+    def _index_entity(self, entity: Entity, moving: bool = False) -> None:
+        """
+        Registra la entidad en los índices correspondientes a su posición actual.
+
+        Si `moving` es True la entidad solo ha cambiado de casilla, así que conserva su hueco en los arrays
+        de bloqueos y basta con sobrescribir sus coordenadas.
+        """
+        position = (entity.x, entity.y)
+        if isinstance(entity, Item):
+            self.items_by_pos.setdefault(position, []).append(entity)
+        elif isinstance(entity, Actor) and entity.is_alive:
+            self.actor_grid[position] = entity  # Solo se indexan los actores vivos.
+            self.actors_version += 1
+            enemies = self._enemies
+            if enemies is not None and not moving and entity is not self.engine.player:
+                enemies[entity] = None
+        if entity.blocks_movement:
+            self.blocker_grid[position] = entity
+            index = self._blocker_slots.get(entity) if moving else None
+            if index is None:
+                self._add_blocker(entity)
+            else:
+                self._blocker_xs[index] = entity.x  # Actualiza la posición en su mismo hueco.
+                self._blocker_ys[index] = entity.y
+            self.blockers_version += 1
+
+    def _unindex_entity(self, entity: Entity, moving: bool = False) -> None:
+        """Elimina la entidad de los índices correspondientes a su posición actual."""
+        position = (entity.x, entity.y)
+        if isinstance(entity, Item):
+            items = self.items_by_pos[position]
+            items.remove(entity)
+            if not items:
+                del self.items_by_pos[position]  # No deja listas vacías en el índice.
+        # Solo se borra la casilla si sigue apuntando a esta entidad.
+        if self.actor_grid.get(position) is entity:
+            del self.actor_grid[position]
+            self.actors_version += 1
+        if not moving and self._enemies is not None:
+            self._enemies.pop(entity, None)  # Al morir o salir del mapa deja de ser un enemigo activo.
+        if self.blocker_grid.get(position) is entity:
+            del self.blocker_grid[position]
+        if entity in self._blocker_slots and not (moving and entity.blocks_movement):
+            self._remove_blocker(entity)
+            self.blockers_version += 1
+
+    def _add_blocker(self, entity: Entity) -> None:
+        """Añade la posición de una entidad que bloquea al final de los arrays de bloqueos."""
+        index = len(self._blocker_entities)
+        if index == len(self._blocker_xs):
+            # Duplica la capacidad de los arrays cuando se llenan.
+            self._blocker_xs = np.concatenate((self._blocker_xs, np.empty_like(self._blocker_xs)))
+            self._blocker_ys = np.concatenate((self._blocker_ys, np.empty_like(self._blocker_ys)))
+        self._blocker_xs[index] = entity.x
+        self._blocker_ys[index] = entity.y
+        self._blocker_slots[entity] = index
+        self._blocker_entities.append(entity)
+
+    def _remove_blocker(self, entity: Entity) -> None:
+        """Quita una entidad de los arrays de bloqueos, moviendo la última a su hueco."""
+        index = self._blocker_slots.pop(entity)
+        last = self._blocker_entities.pop()
+        if last is not entity:
+            last_index = len(self._blocker_entities)  # Índice que ocupaba la última entidad.
+            self._blocker_entities[index] = last
+            self._blocker_slots[last] = index
+            self._blocker_xs[index] = self._blocker_xs[last_index]
+            self._blocker_ys[index] = self._blocker_ys[last_index]
+
     @property
     def gamemap(self) -> GameMap:
         # Propiedad que devuelve el objeto 'GameMap' actual.
@@ -59,6 +241,20 @@ class GameMap:
             if isinstance(entity, Actor) and entity.is_alive  # Solo actores vivos.
         )
 
+    @property
+    def enemies(self) -> Dict[Actor, None]:
+        """
+        Devuelve los actores vivos del mapa que no son el jugador, en orden de llegada.
+
+        Se mantiene al añadir y quitar entidades (moverse no lo cambia), así que los turnos de los enemigos no
+        tienen que filtrar todas las entidades. Quien lo recorra mientras puede morir alguien debe hacer una copia.
+        """
+        enemies = self._enemies
+        if enemies is None:
+            player = self.engine.player
+            enemies = self._enemies = dict.fromkeys(actor for actor in self.actor_grid.values() if actor is not player)
+        return enemies
+
     @property
     def items(self) -> Iterator[Item]:
         """Devuelve un iterador sobre los ítems en el mapa."""
@@ -68,21 +264,174 @@ class GameMap:
         self, location_x: int, location_y: int,
     ) -> Optional[Entity]:
         """Devuelve una entidad que bloquea el movimiento en una ubicación dada, si existe."""
-        for entity in self.entities:
-            if (
-                entity.blocks_movement  # Si la entidad bloquea el movimiento.
-                and entity.x == location_x
-                and entity.y == location_y
-            ):
-                return entity  # Retorna la entidad bloqueadora.
-        return None  # Si no hay entidad bloqueando, retorna None.
+        return self.blocker_grid.get((location_x, location_y))
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
         """Devuelve el actor en una ubicación dada, si existe."""
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor  # Retorna el actor en esa posición.
-        return None  # Si no hay actor, retorna None.
+        return self.actor_grid.get((x, y))
+
+    def get_walkable_padded(self) -> np.ndarray:
+        """
+        Devuelve la matriz de casillas caminables rodeada por un borde de casillas no caminables.
+
+        La casilla (x, y) del mapa está en la posición (x + 1, y + 1), por lo que cualquier destino a una casilla
+        del borde del mapa se puede consultar sin comprobar antes los límites.
+        """
+        if self._walkable_padded is None:
+            self._walkable_padded = np.pad(self.tiles["walkable"], 1, constant_values=False)
+        return self._walkable_padded
+
+    def get_blocker_positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve dos arrays (xs, ys) con las posiciones de las entidades que bloquean el movimiento.
+        Son vistas de los arrays internos: no deben guardarse, ya que cambian con cada movimiento.
+        """
+        count = len(self._blocker_entities)
+        return self._blocker_xs[:count], self._blocker_ys[:count]
+
+    def get_actor_arrays(self) -> Tuple[List[Actor], np.ndarray, np.ndarray]:
+        """
+        Devuelve los actores vivos junto con dos arrays paralelos (xs, ys) con sus posiciones.
+
+        El actor `actors[i]` está en `(xs[i], ys[i])`, lo que permite hacer consultas vectorizadas
+        (distancias, máscaras de visibilidad, etc.) sin recorrer los objetos. Se reconstruye solo
+        cuando cambia algún actor vivo.
+        """
+        if self._actor_arrays_version != self.actors_version:
+            actors = list(self.actor_grid.values())
+            if actors:
+                positions = np.array(list(self.actor_grid), dtype=np.intp)  # Matriz (N, 2) de posiciones.
+                self._actor_arrays = actors, positions[:, 0], positions[:, 1]
+            else:
+                self._actor_arrays = actors, np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+            self._actor_arrays_version = self.actors_version
+        return self._actor_arrays
+
+    def actors_in_radius(self, x: int, y: int, radius: int) -> List[Actor]:
+        """
+        Devuelve los actores vivos a una distancia euclídea menor o igual que `radius` del punto (x, y).
+
+        La consulta se hace de una vez sobre los arrays de posiciones de los actores, comparando distancias
+        al cuadrado; solo se construye la lista con los actores alcanzados.
+        """
+        actors, xs, ys = self.get_actor_arrays()
+        dx = xs - x
+        dy = ys - y
+        return [actors[index] for index in np.flatnonzero(dx * dx + dy * dy <= radius * radius)]
+
+    def refresh_visible_actors(self) -> None:
+        """
+        Recalcula `visible_actors` y sus arrays de coordenadas a partir de la matriz `visible`.
+        Se llama cada vez que se recalcula el FOV.
+        """
+        actors, xs, ys = self.get_actor_arrays()
+        indices = np.flatnonzero(self.visible[xs, ys])
+        self.visible_actors = [actors[index] for index in indices]
+        self.visible_actor_xs = xs[indices]
+        self.visible_actor_ys = ys[indices]
+
+    def get_path_cost(self) -> np.ndarray:
+        """
+        Devuelve la matriz de costes de movimiento para el cálculo de caminos.
+
+        Las casillas caminables cuestan 1 y las ocupadas por una entidad que bloquea cuestan 10 más.
+        La matriz devuelta es un buffer compartido: solo se recalcula cuando cambia alguna entidad que bloquea,
+        y todos los enemigos lo reutilizan mientras tanto.
+        """
+        if self._base_cost is None:
+            self._base_cost = np.ascontiguousarray(self.tiles["walkable"], dtype=np.int8)  # Se calcula una vez por piso.
+            self._cost_scratch = np.empty_like(self._base_cost)
+            self._path_cost_version = -1
+        cost = self._cost_scratch
+        if self._path_cost_version == self.blockers_version:
+            return cost  # Nada ha cambiado desde el último cálculo.
+        self._path_cost_version = self.blockers_version
+        np.copyto(cost, self._base_cost)  # Reutiliza el buffer en lugar de reservar uno nuevo.
+
+        # Encarece las casillas bloqueadas para que los caminos las rodeen.
+        xs, ys = self.get_blocker_positions()
+        blocked = cost[xs, ys] != 0  # Solo se encarecen las casillas caminables.
+        np.add.at(cost, (xs[blocked], ys[blocked]), 10)  # Acumula el coste si varias entidades comparten casilla.
+        return cost
+
+    def get_distance_field(self, dest_x: int, dest_y: int) -> np.ndarray:
+        """
+        Devuelve un mapa de Dijkstra con el coste de llegar desde cada casilla hasta el destino dado.
+
+        Las casillas inalcanzables valen `UNREACHABLE`. Se calcula una sola vez para todos los enemigos que
+        persiguen el mismo destino, y solo se recalcula si cambian el destino o las entidades que bloquean.
+        El camino de cada enemigo se obtiene descendiendo por el mapa con `tcod.path.hillclimb2d`.
+        """
+        key = (dest_x, dest_y, self.blockers_version)
+        field_key = self._distance_field_key
+        if self._distance_field is not None and field_key is not None and (
+            field_key == key
+            # Durante el turno de los enemigos se comparte un único mapa aunque estos se vayan moviendo, pero solo
+            # si se calculó en este mismo turno (con los bloqueos que había al empezarlo).
+            or (self.paths_frozen and field_key[:2] == key[:2] and field_key[2] == self.paths_frozen_version)
+        ):
+            return self._distance_field
+        cost = self.get_path_cost()
+        if self._distance_field is None:
+            self._distance_field = np.empty(cost.shape, dtype=np.int32)  # Se reutiliza durante todo el piso.
+        distance = self._distance_field
+        distance[...] = UNREACHABLE
+        distance[dest_x, dest_y] = 0  # El destino es el origen de la búsqueda.
+        tcod.path.dijkstra2d(distance, cost, 2, 3, out=distance)
+        self._distance_field_key = key
+        return self._distance_field
+
+    def get_flow_field(self, dest_x: int, dest_y: int) -> np.ndarray:
+        """
+        Devuelve un mapa de flujo hacia el destino: cada casilla guarda el índice en `FLOW_DIRECTIONS` de la
+        vecina con menor distancia, o `FLOW_NONE` si ninguna vecina está más cerca.
+
+        Se construye de una vez a partir del mapa de distancias, así que el siguiente paso de cada enemigo
+        es una sola lectura del array.
+        """
+        distance = self.get_distance_field(dest_x, dest_y)
+        key = self._distance_field_key
+        if self._flow_field is None or self._flow_field_key != key:
+            width, height = distance.shape
+            padded = np.full((width + 2, height + 2), UNREACHABLE, dtype=np.int32)  # Borde inalcanzable.
+            padded[1:-1, 1:-1] = distance
+            neighbours = np.stack([
+                padded[1 + dx:width + 1 + dx, 1 + dy:height + 1 + dy] for dx, dy in FLOW_DIRECTIONS
+            ])  # Distancia de cada vecina, una capa por dirección.
+            best = neighbours.argmin(axis=0)
+            closer = np.take_along_axis(neighbours, best[np.newaxis], axis=0)[0] < distance
+            self._flow_field = np.where(closer, best, FLOW_NONE).astype(np.uint8)
+            self._flow_field_key = key
+        return self._flow_field
+
+    def get_cached_path(
+        self, key: Tuple[int, int, int, int],
+    ) -> Optional[Tuple[Tuple[int, int], ...]]:
+        """Devuelve el camino memorizado para (origen_x, origen_y, destino_x, destino_y), si sigue siendo válido."""
+        if self._path_cache_version != self.blockers_version:
+            self._path_cache.clear()  # Las entidades que bloquean han cambiado: los caminos ya no sirven.
+            self._path_cache_version = self.blockers_version
+            return None
+        path = self._path_cache.get(key)
+        if path is not None:
+            self._path_cache.move_to_end(key)  # Marca el camino como usado recientemente.
+        return path
+
+    def cache_path(self, key: Tuple[int, int, int, int], path: Tuple[Tuple[int, int], ...]) -> None:
+        """Memoriza un camino para la versión actual de bloqueos, descartando el más antiguo si se llena."""
+        if self._path_cache_version != self.blockers_version:
+            self._path_cache.clear()
+            self._path_cache_version = self.blockers_version
+        self._path_cache[key] = path
+        if len(self._path_cache) > PATH_CACHE_SIZE:
+            self._path_cache.popitem(last=False)
+
+    def get_item_at_location(self, x: int, y: int) -> Optional[Item]:
+        """Devuelve un ítem en una ubicación dada, si existe."""
+        items = self.items_by_pos.get((x, y))
+        if items:
+            return items[-1]  # El último ítem dejado en la casilla.
+        return None
 
     def in_bounds(self, x: int, y: int) -> bool:
         """Retorna True si las coordenadas (x, y) están dentro de los límites del mapa."""
@@ -117,6 +117,10 @@ class EventHandler(BaseEventHandler):
         if isinstance(action_or_state, BaseEventHandler):
             return action_or_state  # Si es otro manejador, lo retorna como el nuevo manejador.
         if self.handle_action(action_or_state):  # Si se gestionó una acción válida
+            self.engine.mark_dirty()  # La acción ha cambiado el estado: hay que redibujar.
+            # Anuncia en un solo mensaje la experiencia ganada en el turno, venga de donde venga la acción
+            # (movimiento, ataque o un objeto usado desde el inventario o al apuntar).
+            self.engine.player.level.flush_xp()
             if not self.engine.player.is_alive:  # Si el jugador murió
                 return GameOverEventHandler(self.engine)
             elif self.engine.player.level.requires_level_up:  # Si el jugador sube de nivel
@@ -299,6 +303,22 @@ class InventoryEventHandler(AskUserEventHandler):
 
     TITLE = "<missing title>"  # Título del menú de inventario (debe ser definido por las subclases).
 
+    _menu_items: Optional[Tuple[Item, ...]] = None  # Ítems del menú en orden, creados en el primer uso.
+
+    def menu_items(self) -> Tuple[Item, ...]:
+        """
+        Devuelve los ítems del inventario en el orden del menú (a, b, c...).
+
+        El inventario es un diccionario, así que para acceder por posición hace falta una secuencia. Se crea una vez
+        y se reutiliza en cada fotograma y pulsación mientras el menú está abierto; si cambia el número de ítems,
+        se vuelve a crear.
+        """
+        items = self.engine.player.inventory.items
+        menu_items = self._menu_items
+        if menu_items is None or len(menu_items) != len(items):
+            menu_items = self._menu_items = tuple(items)
+        return menu_items
+
     def on_render(self, console: tcod.Console) -> None:
         """Renderiza un menú de inventario, que muestra los ítems en el inventario y la letra para seleccionarlos.
 
@@ -306,8 +326,9 @@ class InventoryEventHandler(AskUserEventHandler):
         """
         super().on_render(console)  # Llama a la renderización del manejador padre.
         
-        # Obtiene el número de ítems en el inventario del jugador.
-        number_of_items_in_inventory = len(self.engine.player.inventory.items)
+        # Obtiene los ítems del inventario del jugador y cuántos hay.
+        menu_items = self.menu_items()
+        number_of_items_in_inventory = len(menu_items)
 
         height = number_of_items_in_inventory + 2  # Altura del menú basada en el número de ítems.
         
@@ -339,7 +360,7 @@ class InventoryEventHandler(AskUserEventHandler):
 
         # Si hay ítems en el inventario, los muestra.
         if number_of_items_in_inventory > 0:
-            for i, item in enumerate(self.engine.player.inventory.items):
+            for i, item in enumerate(menu_items):
                 item_key = chr(ord("a") + i)  # La tecla asociada al ítem (a, b, c...).
                 is_equipped = self.engine.player.equipment.item_is_equipped(item)
 
@@ -354,14 +375,13 @@ class InventoryEventHandler(AskUserEventHandler):
             console.print(x + 1, y + 1, "(Vacio)")  # Si no hay ítems, muestra un mensaje indicando que está vacío.
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
-        player = self.engine.player  # Obtiene al jugador.
         key = event.sym  # Obtiene la tecla presionada.
         index = key - tcod.event.KeySym.a  # Calcula el índice del ítem seleccionado (a, b, c...).
 
         # Verifica que la tecla presionada corresponda a un ítem válido en el inventario (índice de 0 a 26).
         if 0 <= index <= 26:
             try:
-                selected_item = player.inventory.items[index]  # Obtiene el ítem seleccionado.
+                selected_item = self.menu_items()[index]  # Obtiene el ítem seleccionado.
             except IndexError:
                 # Si la tecla presionada está fuera del rango, muestra un mensaje de error.
                 self.engine.message_log.add_message("Tecla no valida.", color.invalid)
@@ -426,8 +446,8 @@ class SelectIndexHandler(AskUserEventHandler):
         """Destaca el tile (casilla) bajo el cursor."""
         super().on_render(console)  # Llama al método de renderizado del manejador base.
         x, y = self.engine.mouse_location  # Obtiene la posición del cursor.
-        console.rgb["bg"][x, y] = color.white  # Cambia el color de fondo del tile bajo el cursor.
-        console.rgb["fg"][x, y] = color.black  # Cambia el color de texto del tile bajo el cursor.
+        console.rgb["bg"][x, y] = color.COLORS[color.ColorId.WHITE]  # Cambia el color de fondo del tile bajo el cursor.
+        console.rgb["fg"][x, y] = color.COLORS[color.ColorId.BLACK]  # Cambia el color de texto del tile bajo el cursor.
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
         """Maneja la entrada de teclas para mover el cursor o confirmar la selección."""
@@ -465,6 +485,17 @@ class SelectIndexHandler(AskUserEventHandler):
         raise NotImplementedError()  # Las subclases deben implementar este método.
 
 
+def target_is_visible(engine: Engine, x: int, y: int) -> bool:
+    """
+    Comprueba que la casilla elegida como objetivo esté a la vista del jugador.
+    Si no lo está, lo indica en el registro de mensajes; así las acciones creadas después pueden confiar en su objetivo.
+    """
+    if engine.game_map.visible[x, y]:
+        return True
+    engine.message_log.add_message("No puedes disparar a un lugar que no puedes ver.", color.impossible)
+    return False
+
+
 # Subclase de SelectIndexHandler que permite al jugador mirar alrededor usando el teclado.
 class LookHandler(SelectIndexHandler):
     """Permite al jugador mirar alrededor usando el teclado."""
@@ -485,7 +516,9 @@ class SingleRangedAttackHandler(SelectIndexHandler):
         self.callback = callback  # Guarda la función de callback para ejecutar el ataque.
 
     def on_index_selected(self, x: int, y: int) -> Optional[Action]:
-        """Cuando se selecciona un índice, ejecuta la acción de ataque usando el callback."""
+        """Cuando se selecciona un índice visible, ejecuta la acción de ataque usando el callback."""
+        if not target_is_visible(self.engine, x, y):
+            return None  # Se queda en la selección para que el jugador elija otra casilla.
         return self.callback((x, y))  # Llama al callback con las coordenadas seleccionadas.
 
 
@@ -520,7 +553,9 @@ class AreaRangedAttackHandler(SelectIndexHandler):
         )
 
     def on_index_selected(self, x: int, y: int) -> Optional[Action]:
-        """Cuando se selecciona un índice, ejecuta la acción de ataque en área usando el callback."""
+        """Cuando se selecciona un índice visible, ejecuta la acción de ataque en área usando el callback."""
+        if not target_is_visible(self.engine, x, y):
+            return None  # Se queda en la selección para que el jugador elija otra casilla.
         return self.callback((x, y))  # Llama al callback con las coordenadas seleccionadas.
 
 # Clase principal que maneja los eventos del juego mientras está en curso.
@@ -540,6 +575,7 @@ class MainGameEventHandler(EventHandler):
 
         self.engine.handle_enemy_turns()
         self.engine.update_fov()
+        self.engine.message_log.flush()  # Cierra el turno volcando los mensajes diferidos.
         return True
 
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
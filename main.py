@@ -27,11 +27,17 @@ else:
 tileset_path = os.path.join(base_path, "dejavu10x10_gs_tc.png")
 
 # Función para guardar la partida actual.
-def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
-    """Guarda el estado del juego en un archivo si el handler tiene un Engine activo."""
+def save_game(handler: input_handlers.BaseEventHandler, filename: str, background: bool = False) -> None:
+    """
+    Guarda el estado del juego en un archivo si el handler tiene un Engine activo.
+    Con background=True la compresión y la escritura se hacen en segundo plano y el juego sigue sin esperar.
+    """
     if isinstance(handler, input_handlers.EventHandler):
-        handler.engine.save_as(filename)
-        print("Partida guardada correctamente.")
+        if background:
+            handler.engine.autosave(filename)
+        else:
+            handler.engine.save_as(filename)
+            print("Partida guardada correctamente.")
 
 # Función principal del juego, donde se configura la pantalla y el bucle de juego.
 def main() -> None:
@@ -77,7 +83,7 @@ def main() -> None:
                                 if event.sym == tcod.event.KeySym.ESCAPE:
                                     if isinstance(handler, input_handlers.EventHandler):
                                         from setup_game import MainMenu
-                                        save_game(handler, "savegame.sav")
+                                        save_game(handler, "savegame.sav", background=True)  # El menú aparece sin esperar al guardado.
                                         handler = MainMenu(context, root_console)
                                         break
                                 handler = handler.handle_events(event)
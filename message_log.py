@@ -4,12 +4,16 @@ Proporciona clases para manejar mensajes individuales y un log completo de mensa
 Los mensajes pueden apilarse si son repetitivos y se renderizan en una región específica de la consola.
 """
 
-from typing import Iterable, List, Reversible, Tuple  # Importaciones necesarias para anotaciones de tipo.
+from collections import deque  # Cola para los mensajes diferidos.
+from contextlib import contextmanager  # Para el gestor de contexto batch().
+from typing import Any, Deque, Iterable, Iterator, List, Reversible, Tuple  # Importaciones necesarias para anotaciones de tipo.
 
 import textwrap  # Se importa para poder ajustar el texto a un ancho determinado.
 import tcod  # Importa la biblioteca tcod, que se utiliza para la consola y gráficos del juego.
 import color  # Importa un módulo de colores que se utilizará en la visualización de los mensajes.
 
+DEBUG_MESSAGES = False  # Si es True, cada mensaje añadido se imprime también por la salida estándar.
+
 # Clase que representa un mensaje individual en el log.
 class Message:
     def __init__(self, text: str, fg: Tuple[int, int, int]):
@@ -28,6 +32,24 @@ class Message:
 class MessageLog:
     def __init__(self) -> None:
         self.messages: List[Message] = []  # Lista para almacenar los mensajes.
+        # Mensajes diferidos del turno actual: (plantilla, argumentos, color, apilar).
+        self.pending: Deque[Tuple[str, Tuple[Any, ...], Tuple[int, int, int], bool]] = deque()
+        self._batching = 0  # Número de bloques batch() abiertos; mientras sea mayor que 0 los mensajes se encolan.
+        self.version = 0  # Aumenta con cada cambio del registro; quien lo dibuja sabe así si debe redibujarlo.
+
+    def __getstate__(self) -> dict:
+        """Guarda el registro sin la cola de mensajes diferidos."""
+        self.flush()
+        state = self.__dict__.copy()
+        del state["pending"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restaura el registro y crea una cola de mensajes diferidos vacía."""
+        self.__dict__.update(state)
+        self.pending = deque()
+        self._batching = 0
+        self.version = 0
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
@@ -39,15 +61,65 @@ class MessageLog:
 
         Si `stack` es True, los mensajes iguales se apilarán (su contador aumentará).
         """
+        if self._batching:
+            self.pending.append((text, (), fg, stack))  # Dentro de batch() se agrega al cerrar el bloque.
+            return
+        if self.pending:
+            self.flush()  # Los mensajes diferidos van antes para conservar el orden.
+        self._append(text, fg, stack)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Agrupa varios mensajes seguidos: dentro del bloque `with message_log.batch():` los mensajes se encolan
+        y se agregan todos de una vez, en orden, al salir del bloque. Los bloques pueden anidarse.
+        """
+        self._batching += 1
+        try:
+            yield
+        finally:
+            self._batching -= 1
+            if not self._batching:
+                self.flush()
+
+    def add_message_deferred(
+        self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True,
+    ) -> None:
+        """
+        Encola un mensaje para agregarlo al registro más tarde, al final del turno o antes del siguiente mensaje inmediato.
+        Pensado para los mensajes que se generan en cada turno de los enemigos.
+        """
+        self.pending.append((text, (), fg, stack))
+
+    def add_message_lazy(
+        self, template: str, *args: Any, fg: Tuple[int, int, int] = color.white, stack: bool = True,
+    ) -> None:
+        """
+        Encola un mensaje diferido sin formatearlo: el texto `template % args` solo se construye al volcarlo.
+        Pensado para los mensajes que se generan para muchos actores a la vez (por ejemplo, una explosión).
+        """
+        self.pending.append((template, args, fg, stack))
+
+    def flush(self) -> None:
+        """Agrega al registro todos los mensajes diferidos, en orden."""
+        pending = self.pending
+        while pending:
+            template, args, fg, stack = pending.popleft()
+            self._append(template % args if args else template, fg, stack)
+
+    def _append(self, text: str, fg: Tuple[int, int, int], stack: bool) -> None:
+        """Agrega un mensaje al final del registro, apilándolo con el último si es igual."""
         # Si el mensaje puede apilarse (stack es True) y el texto del nuevo mensaje es igual al último,
         # se incrementa el contador del mensaje anterior.
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
         else:
             self.messages.append(Message(text, fg))  # Si no, agrega el nuevo mensaje al log.
+        self.version += 1
 
-        # Debugging: Imprime el texto del mensaje para verificar el contenido
-        print(f"Mensaje visible: {text}")
+        if DEBUG_MESSAGES:
+            # Debugging: Imprime el texto del mensaje para verificar el contenido
+            print(f"Mensaje visible: {text}")
 
     def render(
         self, console: tcod.console.Console, x: int, y: int, width: int, height: int,
@@ -0,0 +1,37 @@
+"""
+Este módulo reúne la restauración del estado de los objetos al cargar una partida guardada.
+
+Las clases con `__slots__` se guardan como una tupla (diccionario, slots), mientras que las partidas antiguas,
+de antes de añadir `__slots__`, guardaban un único diccionario. Todas las clases aceptan ambos formatos.
+"""
+
+from __future__ import annotations  # Permite usar anotaciones de tipo antes de su definición completa.
+from typing import Any, Callable, Container, Dict, Optional  # Importa tipos para la anotación de tipos.
+
+
+def state_values(state: Any) -> Dict[str, Any]:
+    """Devuelve en un solo diccionario los atributos guardados, sea cual sea el formato de la partida."""
+    if isinstance(state, tuple):
+        dict_state, slot_state = state
+    else:
+        dict_state, slot_state = state, None
+    return {**(dict_state or {}), **(slot_state or {})}
+
+
+def restore_state(
+    obj: object,
+    state: Any,
+    setter: Callable[[object, str, Any], None] = setattr,
+    fields: Optional[Container[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Asigna a 'obj' los atributos guardados en 'state' y devuelve el diccionario con todos ellos.
+
+    :param setter: Función con la que se asigna cada atributo (p. ej. object.__setattr__ en clases inmutables).
+    :param fields: Si se indica, solo se restauran estos atributos; el resto se ignoran.
+    """
+    values = state_values(state)
+    for name, value in values.items():
+        if fields is None or name in fields:
+            setter(obj, name, value)
+    return values
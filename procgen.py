@@ -4,7 +4,6 @@ Proporciona funciones para crear salas, túneles, habitaciones secretas y gestio
 """
 
 from __future__ import annotations  # Permite la postergación de las anotaciones de tipo para evitar problemas con clases definidas más tarde.
-from components.equippable import ChainMail # Importa la clase ChainMail para el equipo.
 from game_map import GameMap  # Importa la clase GameMap, que maneja el mapa del juego.
 from typing import Iterator, List, Tuple, TYPE_CHECKING, Dict  # Importación de tipos para la comprobación de tipos.
 
@@ -18,6 +17,9 @@ if TYPE_CHECKING:
     from engine import Engine  
     from entity import Entity  
 
+# Lados de una sala en los que puede abrirse una sala secreta, creados una sola vez.
+SECRET_ROOM_DIRECTIONS = ("N", "S", "E", "W")
+
 # Definición de los máximos posibles de ítems por nivel de piso.
 max_items_by_floor = [
     (1, 1),  # A partir del nivel 1, máximo 1 ítem.
@@ -189,7 +191,7 @@ def generate_secret_rooms(
             parent_room = random.choice(rooms)
 
             # Determina la posición de la habitación secreta adyacente a la habitación principal.
-            direction = random.choice(["N", "S", "E", "W"])
+            direction = SECRET_ROOM_DIRECTIONS[random.randrange(4)]
             if direction == "N":
                 x1_start = parent_room.x1 + 1
                 x1_end = parent_room.x2 - width - 1
@@ -7,6 +7,7 @@ from __future__ import annotations  # Permite la postergación de las anotacione
 from typing import TYPE_CHECKING, Tuple  # IMPORTA: TYPE_CHECKING ayuda con las verificaciones de tipos en tiempo de análisis, y Tuple es para tuplas con tipos definidos.
 
 import color  # Importa el módulo de colores personalizados.
+from color import COLORS, ColorId  # Tabla de colores en uint8 para escribir directamente en console.rgb.
 
 # Este bloque solo importa las clases cuando se está realizando una comprobación de tipos, no se ejecuta en tiempo de ejecución.
 if TYPE_CHECKING:
@@ -31,6 +32,18 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
     return names.capitalize()  # Capitaliza la primera letra del nombre para presentación.
 
 
+def _fill_bar(console: Console, y: int, bar_width: int, total_width: int, filled: ColorId) -> None:
+    """
+    Rellena la fila de una barra escribiendo directamente en `console.rgb` (consolas en orden "F", indexadas [x, y]):
+    el fondo de la parte llena y el de la vacía se copian de la tabla COLORS con una asignación cada uno.
+    """
+    bar_width = max(0, min(bar_width, total_width))
+    row = console.rgb[0:total_width, y]
+    row["ch"] = 1
+    row["bg"][:bar_width] = COLORS[filled]  # Parte llena.
+    row["bg"][bar_width:] = COLORS[ColorId.BAR_EMPTY]  # Parte vacía.
+
+
 def render_bar(
     console: Console, current_value: int, maximum_value: int, total_width: int
 ) -> None:
@@ -39,13 +52,8 @@ def render_bar(
     """
     bar_width = int(float(current_value) / maximum_value * total_width)  # Calcula el ancho de la barra en función del valor actual.
 
-    # Dibuja el fondo vacío de la barra.
-    console.draw_rect(x=0, y=45, width=20, height=1, ch=1, bg=color.bar_empty)
-
-    if bar_width > 0:  # Si hay algo de llenado en la barra, dibuja la parte llena.
-        console.draw_rect(
-            x=0, y=45, width=bar_width, height=1, ch=1, bg=color.bar_filled
-        )
+    # Dibuja la barra: la parte llena en verde y el resto con el fondo vacío.
+    _fill_bar(console, y=45, bar_width=bar_width, total_width=total_width, filled=ColorId.BAR_FILLED)
 
     # Imprime el texto con los valores de salud en la barra.
     console.print(
@@ -64,13 +72,8 @@ def render_xp_bar(
     else:
         bar_width = int(float(current_xp) / xp_to_next_level * total_width)
 
-    # Dibuja el fondo vacío de la barra de XP.
-    console.draw_rect(x=0, y=46, width=20, height=1, ch=1, bg=color.bar_empty)
-
-    if bar_width > 0:
-        console.draw_rect(
-            x=0, y=46, width=bar_width, height=1, ch=1, bg=(0, 0, 200)
-        )
+    # Dibuja la barra de XP: la parte llena en azul y el resto con el fondo vacío.
+    _fill_bar(console, y=46, bar_width=bar_width, total_width=total_width, filled=ColorId.XP_BAR_FILLED)
 
     # Imprime el texto con los valores de XP en la barra.
     console.print(
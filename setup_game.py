@@ -9,12 +9,11 @@ from tcod import console  # Importa la biblioteca tcod para consola y gráficos.
 from tcod import libtcodpy  # Importa libtcodpy (funciones de bajo nivel).
 from tcod import context  # Maneja el contexto de la consola.
 from tcod import console  # Importa la clase Console para manejar la consola de salida.
-from engine import Engine  # La clase principal para el motor del juego.
+from engine import Engine, read_save, wait_for_saves  # La clase principal para el motor del juego.
 from game_map import GameWorld  # La clase que define el mundo del juego.
 
 import copy  # Para hacer copias profundas de objetos.
 import lzma  # Para comprimir y descomprimir datos con el algoritmo LZMA.
-import pickle  # Para serializar y deserializar objetos Python.
 import traceback  # Para capturar y mostrar rastros de errores.
 import time  # Para manejar pausas y temporizadores.
 import tcod  # Librería principal para crear roguelikes.
@@ -70,13 +69,10 @@ def new_game(context: tcod.context.Context, console: tcod.Console) -> Engine:
     leather_armor = copy.deepcopy(entity_factories.leather_armor)
 
     # Agrega los objetos al inventario del jugador.
-    dagger.parent = player.inventory
-    leather_armor.parent = player.inventory
-
-    player.inventory.items.append(dagger)
+    player.inventory.add(dagger)
     player.equipment.toggle_equip(dagger, add_message=False)
 
-    player.inventory.items.append(leather_armor)
+    player.inventory.add(leather_armor)
     player.equipment.toggle_equip(leather_armor, add_message=False)
 
     return engine  # Devuelve el motor de juego con todos los elementos inicializados.
@@ -84,9 +80,11 @@ def new_game(context: tcod.context.Context, console: tcod.Console) -> Engine:
 # Función para cargar una partida desde un archivo.
 def load_game(filename: str, context: tcod.context.Context, console: tcod.Console) -> Engine:
     """Carga una instancia de Engine desde un archivo y restaura el contexto y la consola."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))  # Descomprime y carga el objeto.
+    wait_for_saves()  # Si se está guardando esta partida en segundo plano, espera a que el archivo esté completo.
+    with lzma.open(filename, "rb") as f:
+        engine = read_save(f)  # Descomprime y carga el pickle y los arrays del mapa guardados aparte.
     assert isinstance(engine, Engine)  # Asegura que el objeto cargado es una instancia de Engine.
+    engine.player.attack_color = color.player_atk  # Partidas guardadas antes de existir este atributo.
 
     engine.context = context  # Restaura el contexto.
     engine.console = console  # Restaura la consola.